@@ -0,0 +1,174 @@
+"""
+Streaming attendance exports (CSV, NDJSON, Parquet).
+
+Rows come from a values_list queryset read with iterator(chunk_size=...)
+(a server-side cursor on PostgreSQL), and each chunk is encoded and handed to
+StreamingHttpResponse as soon as it is read. Memory stays constant however
+many rows are exported, and the first bytes go out before the query finishes.
+"""
+import csv
+import datetime
+import io
+import itertools
+import json
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Parquet output is optional
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# (column name, queryset field)
+RECORD_COLUMNS = (
+    ('id', 'id'),
+    ('event_id', 'event_id'),
+    ('event', 'event__name'),
+    ('student_id', 'student_id'),
+    ('student', 'student__username'),
+    ('date', 'date'),
+    ('time', 'time'),
+    ('status', 'status'),
+    ('confidence_score', 'confidence_score'),
+)
+SUMMARY_COLUMNS = (
+    ('event_id', 'event_id'),
+    ('event', 'event__name'),
+    ('date', 'date'),
+    ('enrolled', 'enrolled_count'),
+    ('present', 'present_count'),
+    ('late', 'late_count'),
+    ('absent', 'absent_count'),
+    ('mean_confidence', 'mean_confidence'),
+)
+
+
+def chunked_rows(queryset, columns, chunk_size=None):
+    """
+    Yield lists of row tuples, chunk_size rows at a time, straight from the database cursor.
+    """
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    rows = queryset.values_list(*[field for _, field in columns]).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_value(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    for chunk in itertools.chain([()], chunks):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_ndjson(chunks, columns):
+    names = [name for name, _ in columns]
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps({name: _json_value(value) for name, value in zip(names, row)}) + '\n'
+            for row in chunk
+        )
+
+
+def _parquet_schema(names):
+    types = {
+        'date': pyarrow.date32(),
+        'time': pyarrow.time64('us'),
+        'confidence_score': pyarrow.float64(),
+        'mean_confidence': pyarrow.float64(),
+        'event': pyarrow.string(),
+        'student': pyarrow.string(),
+        'status': pyarrow.string(),
+    }
+    return pyarrow.schema([(name, types.get(name, pyarrow.int64())) for name in names])
+
+
+class _ParquetSink:
+    """
+    Write-only file that hands out what was written since the last drain().
+    It keeps counting positions across drains, which the Parquet footer needs.
+    """
+
+    def __init__(self):
+        self.closed = False
+        self._position = 0
+        self._pending = []
+
+    def write(self, data):
+        data = bytes(data)
+        self._pending.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._pending)
+        self._pending = []
+        return data
+
+
+def stream_parquet(chunks, columns):
+    """
+    One Parquet row group per chunk; the bytes written for each row group are
+    sent before the next chunk is read.
+    """
+    names = [name for name, _ in columns]
+    schema = _parquet_schema(names)
+    sink = _ParquetSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+    for chunk in chunks:
+        writer.write_table(pyarrow.Table.from_pydict(
+            {name: [row[i] for row in chunk] for i, name in enumerate(names)}, schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+STREAMERS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+    'parquet': stream_parquet,
+}
+
+
+def stream_export(queryset, columns, export_format):
+    """
+    Byte/str chunks of queryset exported as export_format ('csv', 'ndjson' or 'parquet').
+    """
+    return STREAMERS[export_format](chunked_rows(queryset, columns), columns)
@@ -0,0 +1,69 @@
+"""
+Query-string filters for the event and attendance listings.
+
+    /events/?date_from=2024-01-01&date_to=2024-01-31&is_live=true
+    /attendance/?event=12&date_from=2024-01-01&date_to=2024-01-31&status=present,late
+    /attendance/export/?event=12&output=csv (same filters, see api.exports)
+"""
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import AttendanceRecord
+
+
+def date_param(request, key):
+    """A YYYY-MM-DD query parameter as a date, or None when absent."""
+    value = request.query_params.get(key)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({key: "Expected a date as YYYY-MM-DD"})
+    return parsed
+
+
+def filter_date_range(queryset, request, field='date'):
+    date_from = date_param(request, 'date_from')
+    date_to = date_param(request, 'date_to')
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': date_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__lte': date_to})
+    return queryset
+
+
+def filter_events(queryset, request):
+    queryset = filter_date_range(queryset, request)
+    is_live = request.query_params.get('is_live')
+    if is_live:
+        if is_live.lower() not in ('true', 'false', '1', '0'):
+            raise ValidationError({'is_live': "Expected true or false"})
+        queryset = queryset.filter(is_live=is_live.lower() in ('true', '1'))
+    return queryset
+
+
+def filter_event(queryset, request):
+    event_id = request.query_params.get('event')
+    if event_id:
+        if not event_id.isdigit():
+            raise ValidationError({'event': "Expected an event id"})
+        queryset = queryset.filter(event_id=int(event_id))
+    return queryset
+
+
+def filter_attendance(queryset, request):
+    params = request.query_params
+    queryset = filter_event(queryset, request)
+    queryset = filter_date_range(queryset, request)
+
+    statuses = [s for s in params.get('status', '').split(',') if s]
+    if statuses:
+        valid = {choice for choice, _ in AttendanceRecord.STATUS_CHOICES}
+        unknown = set(statuses) - valid
+        if unknown:
+            raise ValidationError({'status': f"Unknown status: {', '.join(sorted(unknown))}"})
+        queryset = queryset.filter(status__in=statuses)
+    return queryset
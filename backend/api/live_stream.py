@@ -0,0 +1,229 @@
+"""
+Live attendance stream (ASGI WebSocket).
+
+    ws://<host>/ws/live/<event_id>/?token=<JWT access token>
+
+The host of a live event (Event.is_live) opens one socket per session instead
+of posting every frame to batch_recognize. Authentication, the event lookup and
+the host check happen once on connect; the event's embedding gallery stays
+resident in the gallery cache. Each frame is then only detected, matched and
+written.
+
+Client -> server: binary messages with an encoded frame (JPEG/PNG), or text
+messages {"image": "<base64 data URL>"}.
+Server -> client: {"type": "ready", ...} after connect, then one
+{"type": "matches", "frame": n, "matches_count": ..., "results": [...]} per
+processed frame. If frames arrive faster than they can be processed, only the
+newest pending frame is kept and "dropped_frames" counts the skipped ones.
+"""
+import asyncio
+import json
+import re
+import time
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .services.attendance_service import mark_batch_matches
+from .services.encoder_pool import FaceEncoderUnavailable
+from .services.face_service import recognize_faces_in_image
+from .services.gallery_cache import get_event_gallery
+
+logger = logging.getLogger(__name__)
+
+LIVE_PATH = re.compile(r'^/ws/live/(?P<event_id>\d+)/?$')
+
+# Application-defined close codes (4000-4999)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_FORBIDDEN = 4403
+CLOSE_NOT_FOUND = 4404
+CLOSE_SESSION_ENDED = 4410
+
+
+def _authenticate(raw_token):
+    """Return the user for a JWT access token, or None."""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed, TokenError
+
+    if not raw_token:
+        return None
+    close_old_connections()
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed, TokenError):
+        return None
+
+
+def _load_event(event_id):
+    from api.models import Event
+
+    close_old_connections()
+    return Event.objects.filter(id=event_id).first()
+
+
+def _is_live(event_id):
+    from api.models import Event
+
+    close_old_connections()
+    return Event.objects.filter(id=event_id, is_live=True).exists()
+
+
+def _write_matches(event, matches):
+    close_old_connections()
+    return mark_batch_matches(event, matches)
+
+
+class LiveAttendanceStream:
+    """
+    One WebSocket connection for a live session.
+    """
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.event = None
+        self.frames = asyncio.Queue(maxsize=1)
+        self.dropped_frames = 0
+        self.processed_frames = 0
+        self.closed = False
+
+    async def send_json(self, payload):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(payload)})
+
+    async def close(self, code=1000):
+        if not self.closed:
+            self.closed = True
+            await self.send({'type': 'websocket.close', 'code': code})
+
+    async def connect(self, event_id):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        user = await sync_to_async(_authenticate)((query.get('token') or [None])[0])
+        if user is None:
+            return CLOSE_UNAUTHORIZED
+
+        event = await sync_to_async(_load_event)(event_id)
+        if event is None:
+            return CLOSE_NOT_FOUND
+        if event.host_id != user.id:
+            return CLOSE_FORBIDDEN
+        if not event.is_live:
+            return CLOSE_SESSION_ENDED
+
+        self.event = event
+        return None
+
+    async def __call__(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+
+        match = LIVE_PATH.match(self.scope['path'])
+        close_code = await self.connect(int(match.group('event_id')))
+        if close_code is not None:
+            # Rejecting the handshake: close before accept
+            await self.close(close_code)
+            return
+
+        await self.send({'type': 'websocket.accept'})
+        gallery = await sync_to_async(get_event_gallery)(self.event.id)
+        await self.send_json({'type': 'ready', 'event_id': self.event.id, 'enrolled_faces': len(gallery)})
+
+        worker = asyncio.ensure_future(self.process_frames())
+        try:
+            await self.receive_frames()
+        finally:
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+
+    async def receive_frames(self):
+        while True:
+            message = await self.receive()
+            if message['type'] == 'websocket.disconnect':
+                self.closed = True
+                return
+            if message['type'] != 'websocket.receive':
+                continue
+
+            frame = message.get('bytes')
+            if frame is None and message.get('text'):
+                try:
+                    frame = json.loads(message['text']).get('image')
+                except (ValueError, AttributeError):
+                    await self.send_json({'type': 'error', 'message': 'Expected binary frame or {"image": ...}'})
+                    continue
+            if not frame:
+                continue
+
+            # Keep only the newest frame waiting
+            if self.frames.full():
+                self.frames.get_nowait()
+                self.dropped_frames += 1
+            self.frames.put_nowait(frame)
+
+    async def process_frames(self):
+        live_check_interval = getattr(settings, 'LIVE_STREAM_LIVE_CHECK_SECONDS', 10)
+        last_live_check = time.monotonic()
+
+        while True:
+            frame = await self.frames.get()
+
+            if time.monotonic() - last_live_check >= live_check_interval:
+                last_live_check = time.monotonic()
+                if not await sync_to_async(_is_live)(self.event.id):
+                    await self.send_json({'type': 'ended', 'message': 'Session has ended'})
+                    await self.close(CLOSE_SESSION_ENDED)
+                    return
+
+            gallery = await sync_to_async(get_event_gallery)(self.event.id)
+            self.processed_frames += 1
+            if not len(gallery):
+                await self.send_json({
+                    'type': 'matches', 'frame': self.processed_frames, 'matches_count': 0, 'results': [],
+                    'message': 'No students with enrolled faces found for this event'
+                })
+                continue
+
+            try:
+                # Detection and matching hold no DB state, so they may run off the DB thread
+                matches = await sync_to_async(recognize_faces_in_image, thread_sensitive=False)(frame, gallery)
+            except FaceEncoderUnavailable as e:
+                logger.warning(f"Face encoder unavailable: {str(e)}")
+                await self.send_json({'type': 'busy', 'frame': self.processed_frames})
+                continue
+
+            results = await sync_to_async(_write_matches)(self.event, matches)
+            await self.send_json({
+                'type': 'matches',
+                'frame': self.processed_frames,
+                'dropped_frames': self.dropped_frames,
+                'matches_count': len(results),
+                'results': results,
+            })
+
+
+class LiveStreamRouter:
+    """
+    ASGI app sending /ws/live/<event_id>/ WebSockets to LiveAttendanceStream
+    and everything else to the Django application.
+    """
+
+    def __init__(self, django_app):
+        self.django_app = django_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'websocket':
+            if LIVE_PATH.match(scope['path']):
+                await LiveAttendanceStream(scope, receive, send)()
+            else:
+                await receive()
+                await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+            return
+        await self.django_app(scope, receive, send)
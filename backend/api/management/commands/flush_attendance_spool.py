@@ -0,0 +1,22 @@
+"""
+Django management command to write spooled mark_live attendance to the database.
+
+Usage:
+    python manage.py flush_attendance_spool
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.services.attendance_spool import AttendanceSpool, flush_spool
+
+
+class Command(BaseCommand):
+    help = 'Flush the mark_live attendance spool into AttendanceRecord'
+
+    def handle(self, *args, **options):
+        spool = AttendanceSpool(settings.ATTENDANCE_SPOOL_PATH)
+        pending = len(spool)
+        if not pending:
+            self.stdout.write(self.style.SUCCESS('Attendance spool is empty'))
+            return
+        flushed = flush_spool(spool)
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} of {pending} spooled attendance records'))
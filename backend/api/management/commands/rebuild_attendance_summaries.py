@@ -0,0 +1,39 @@
+"""
+Django management command to rebuild or verify the attendance summary table.
+
+Usage:
+    python manage.py rebuild_attendance_summaries
+    python manage.py rebuild_attendance_summaries --event <event_id>
+    python manage.py rebuild_attendance_summaries --verify
+"""
+from django.core.management.base import BaseCommand, CommandError
+from api.services.summary_service import rebuild_attendance_summaries, verify_attendance_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild AttendanceSummary from raw attendance records and verify it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--event',
+            type=int,
+            action='append',
+            help='Only rebuild this event (can be repeated)',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare the table with the raw records, without rewriting it',
+        )
+
+    def handle(self, *args, **options):
+        if not options.get('verify'):
+            written = rebuild_attendance_summaries(options.get('event'))
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} attendance summary rows'))
+
+        problems = verify_attendance_summaries()
+        for problem in problems:
+            self.stdout.write(self.style.ERROR(f'  {problem}'))
+        if problems:
+            raise CommandError(f'{len(problems)} attendance summary mismatches found')
+        self.stdout.write(self.style.SUCCESS('Attendance summaries match the raw records'))
@@ -8,8 +8,11 @@ Usage:
 """
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.db.models import Q
 import numpy as np
+from api.models import FaceEmbedding
 from api.services.face_service import bytes_to_face_encoding
+from api.services.embedding_store import HEADER, decode_header
 
 User = get_user_model()
 
@@ -40,7 +43,9 @@ class Command(BaseCommand):
             except User.DoesNotExist:
                 self.stdout.write(self.style.ERROR(f'User "{username}" not found'))
         elif check_all:
-            users_with_faces = User.objects.exclude(face_embedding__isnull=True).exclude(face_embedding=b'')
+            users_with_faces = User.objects.filter(
+                Q(face_templates__isnull=False) | (Q(face_embedding__isnull=False) & ~Q(face_embedding=b''))
+            ).distinct()
             total = users_with_faces.count()
             self.stdout.write(self.style.SUCCESS(f'Checking {total} users with face embeddings...\n'))
             
@@ -59,24 +64,41 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f'User: {user.username} (ID: {user.id})'))
         self.stdout.write(f'Role: {user.role}')
         
-        if not user.face_embedding:
+        # Get binary data (embedding table first, legacy user column second)
+        template = FaceEmbedding.objects.filter(user=user).values_list('data', flat=True).first()
+        if template is not None:
+            binary_data = bytes(template)
+            self.stdout.write('Storage: FaceEmbedding table')
+        elif user.face_embedding:
+            binary_data = bytes(user.face_embedding)
+            self.stdout.write(self.style.WARNING('Storage: legacy user.face_embedding column'))
+        else:
             self.stdout.write(self.style.ERROR('❌ face_embedding is NULL or empty'))
             return
         
-        # Get binary data
-        binary_data = user.face_embedding
-        
         # Check binary length
         binary_len = len(binary_data)
         self.stdout.write(f'Binary Data Length: {binary_len} bytes')
         
-        # Expected size for 128 floats (float64 = 8 bytes each)
-        expected_size_128 = 128 * 8  # 1024 bytes
-        expected_size_512 = 512 * 8  # 4096 bytes
-        
         if binary_len == 0:
             self.stdout.write(self.style.ERROR('❌ Binary data is empty'))
             return
+
+        header = decode_header(binary_data)
+        if header:
+            self.stdout.write(
+                f'Header: v{header["version"]} dtype={header["dtype"]} dim={header["dimension"]} '
+                f'model={header["model_id"]} norm={header["norm"]:.6f}'
+            )
+            itemsize = header['dtype'].itemsize if header['dtype'] is not None else 0
+            header_size = HEADER.size
+        else:
+            itemsize = 8  # legacy raw float64
+            header_size = 0
+
+        # Expected size for 128 / 512 components
+        expected_size_128 = header_size + 128 * itemsize
+        expected_size_512 = header_size + 512 * itemsize
         
         # Try to convert back to numpy array
         try:
@@ -113,9 +135,9 @@ class Command(BaseCommand):
             
             # Check binary size matches array size
             if binary_len == expected_size_128:
-                self.stdout.write(self.style.SUCCESS(f'✅ Binary size matches 128D float64 array ({expected_size_128} bytes)'))
+                self.stdout.write(self.style.SUCCESS(f'✅ Binary size matches 128D array ({expected_size_128} bytes)'))
             elif binary_len == expected_size_512:
-                self.stdout.write(self.style.WARNING(f'⚠️  Binary size matches 512D float64 array ({expected_size_512} bytes)'))
+                self.stdout.write(self.style.WARNING(f'⚠️  Binary size matches 512D array ({expected_size_512} bytes)'))
             else:
                 self.stdout.write(self.style.ERROR(f'❌ Binary size mismatch: {binary_len} bytes (expected {expected_size_128} or {expected_size_512})'))
                 
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from api.services.embedding_store import decode_embedding, encode_embedding
+
+
+def move_embeddings_off_user_table(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    FaceEmbedding = apps.get_model('api', 'FaceEmbedding')
+
+    for user_id, blob in User.objects.filter(face_embedding__isnull=False).values_list('id', 'face_embedding'):
+        try:
+            encoding = decode_embedding(blob)
+        except ValueError:
+            continue
+        FaceEmbedding.objects.update_or_create(user_id=user_id, defaults={'data': encode_embedding(encoding)})
+        User.objects.filter(id=user_id).update(face_embedding=None)
+
+
+def restore_embeddings_on_user_table(apps, schema_editor):
+    User = apps.get_model('api', 'User')
+    FaceEmbedding = apps.get_model('api', 'FaceEmbedding')
+
+    for user_id, blob in FaceEmbedding.objects.values_list('user_id', 'data'):
+        User.objects.filter(id=user_id).update(face_embedding=decode_embedding(blob).tobytes())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_event_is_live'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='face_embedding',
+            field=models.BinaryField(blank=True, help_text='Legacy numpy array bytes; new enrollments are stored in FaceEmbedding', null=True),
+        ),
+        migrations.CreateModel(
+            name='FaceEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField(help_text='Versioned header + float32/float16 encoding')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='face_template', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(move_embeddings_off_user_table, restore_embeddings_on_user_table),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_faceembedding'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='faceembedding',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='face_templates', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
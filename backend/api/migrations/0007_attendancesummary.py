@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Avg, Count, Q
+
+
+def build_summaries(apps, schema_editor):
+    AttendanceRecord = apps.get_model('api', 'AttendanceRecord')
+    AttendanceSummary = apps.get_model('api', 'AttendanceSummary')
+    Event = apps.get_model('api', 'Event')
+
+    enrolled = dict(Event.objects.annotate(n=Count('enrollments')).filter(n__gt=0).values_list('id', 'n'))
+    keys = {(event_id, date): None for event_id, date in Event.objects.filter(id__in=enrolled).values_list('id', 'date')}
+    for row in AttendanceRecord.objects.values('event_id', 'date').annotate(
+        present=Count('id', filter=Q(status='present')),
+        late=Count('id', filter=Q(status='late')),
+        confidence=Avg('confidence_score', filter=Q(status__in=['present', 'late'])),
+    ):
+        keys[(row['event_id'], row['date'])] = row
+
+    summaries = []
+    for (event_id, date), row in keys.items():
+        present = row['present'] if row else 0
+        late = row['late'] if row else 0
+        enrolled_count = enrolled.get(event_id, 0)
+        summaries.append(AttendanceSummary(
+            event_id=event_id, date=date, enrolled_count=enrolled_count,
+            present_count=present, late_count=late,
+            absent_count=max(enrolled_count - present - late, 0),
+            mean_confidence=row['confidence'] if row else None,
+        ))
+    AttendanceSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_faceembedding_templates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('enrolled_count', models.IntegerField(default=0)),
+                ('present_count', models.IntegerField(default=0)),
+                ('late_count', models.IntegerField(default=0)),
+                ('absent_count', models.IntegerField(default=0, help_text='Enrolled students not marked present or late')),
+                ('mean_confidence', models.FloatField(blank=True, help_text='Mean confidence of present/late records', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='api.event')),
+            ],
+            options={
+                'unique_together': {('event', 'date')},
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
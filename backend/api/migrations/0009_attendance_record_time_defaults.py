@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:14
+
+import api.models
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_attendance_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='date',
+            field=models.DateField(default=datetime.date.today),
+        ),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='time',
+            field=models.TimeField(default=api.models.current_time),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from datetime import timedelta
+import datetime
 import random
 import string
 
@@ -14,13 +15,24 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='student')
     phone = models.CharField(max_length=20, blank=True)
-    face_embedding = models.BinaryField(null=True, blank=True, help_text="Numpy array bytes")
+    face_embedding = models.BinaryField(null=True, blank=True, help_text="Legacy numpy array bytes; new enrollments are stored in FaceEmbedding")
     is_email_verified = models.BooleanField(default=False)
     two_factor_secret = models.CharField(max_length=32, blank=True)
     
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+class FaceEmbedding(models.Model):
+    """Enrolled face template, kept off the user table (see services.embedding_store).
+    A user may have a few templates when enrolled from multiple frames."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='face_templates')
+    data = models.BinaryField(help_text="Versioned header + float32/float16 encoding")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Face embedding for user {self.user_id}"
+
 class Event(models.Model):
     host = models.ForeignKey(User, on_delete=models.CASCADE, related_name='hosted_events')
     name = models.CharField(max_length=200)
@@ -48,6 +60,10 @@ class Enrollment(models.Model):
     class Meta:
         unique_together = ('student', 'event')
 
+def current_time():
+    return datetime.datetime.now().time()
+
+
 class AttendanceRecord(models.Model):
     STATUS_CHOICES = (
         ('present', 'Present'),
@@ -58,17 +74,43 @@ class AttendanceRecord(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_records')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     timestamp = models.DateTimeField(auto_now_add=True)
-    date = models.DateField(auto_now_add=True)  # Added date field
-    time = models.TimeField(auto_now_add=True)  # Added time field
+    # Filled in on creation; callable defaults rather than auto_now_add so spooled
+    # writes (services.attendance_spool) keep the time the student was recognized
+    date = models.DateField(default=datetime.date.today)
+    time = models.TimeField(default=current_time)
     confidence_score = models.FloatField(help_text="Face recognition confidence")
 
     class Meta:
         unique_together = ('event', 'student', 'date')
+        indexes = [
+            # Keyset pagination of a host's / a student's history, newest first
+            models.Index(fields=['event', '-timestamp', '-id'], name='attendance_event_ts_idx'),
+            models.Index(fields=['student', '-timestamp', '-id'], name='attendance_student_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.event.name} - {self.status}"
 
 
+class AttendanceSummary(models.Model):
+    """Per (event, date) attendance counts, kept up to date from AttendanceRecord
+    writes (see services.summary_service) so dashboards don't scan raw records."""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='attendance_summaries')
+    date = models.DateField()
+    enrolled_count = models.IntegerField(default=0)
+    present_count = models.IntegerField(default=0)
+    late_count = models.IntegerField(default=0)
+    absent_count = models.IntegerField(default=0, help_text="Enrolled students not marked present or late")
+    mean_confidence = models.FloatField(null=True, blank=True, help_text="Mean confidence of present/late records")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('event', 'date')
+
+    def __str__(self):
+        return f"{self.event.name} - {self.date}: {self.present_count + self.late_count}/{self.enrolled_count}"
+
+
 def default_expiry():
     return timezone.now() + timedelta(hours=48)
 
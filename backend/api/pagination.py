@@ -0,0 +1,29 @@
+"""
+Keyset (cursor) pagination for the event and attendance listings.
+
+Pages are only served when the client asks for them with ?page_size= or by
+following a ?cursor= link, so existing clients that expect a plain list keep
+working. A page is one index-ordered query with a LIMIT, however much history
+the host has, unlike offset paging whose cost grows with the page number.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class EventCursorPagination(OptionalCursorPagination):
+    ordering = ('-date', '-time', '-id')
+
+
+class AttendanceCursorPagination(OptionalCursorPagination):
+    ordering = ('-timestamp', '-id')
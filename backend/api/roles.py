@@ -0,0 +1,39 @@
+"""
+Role resolution for the event endpoints.
+
+A user acts as a host when their role is 'host' or, as a fallback for role
+mismatches, when they own at least one event. The ownership check used to be
+an EXISTS query on every event request. It is now answered from the user
+object for role hosts and otherwise cached per user: on the request's user
+instance for the rest of the request, and in the Django cache across requests
+(invalidated by api.signals when an event is created or deleted).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+HOST_CACHE_KEY = 'api:owns-events:{user_id}'
+
+
+def _owns_events(user) -> bool:
+    from api.models import Event
+
+    key = HOST_CACHE_KEY.format(user_id=user.id)
+    owns = cache.get(key)
+    if owns is None:
+        owns = Event.objects.filter(host_id=user.id).exists()
+        cache.set(key, owns, getattr(settings, 'HOST_ROLE_CACHE_TTL', 300))
+    return owns
+
+
+def is_host(user) -> bool:
+    """Whether the user should see the host view of events."""
+    cached = getattr(user, '_is_host', None)
+    if cached is None:
+        cached = bool(user.role and user.role.lower() == 'host') or _owns_events(user)
+        user._is_host = cached
+    return cached
+
+
+def invalidate_host_role(user_id: int) -> None:
+    """Forget a user's cached event ownership, after they gain or lose an event."""
+    cache.delete(HOST_CACHE_KEY.format(user_id=user_id))
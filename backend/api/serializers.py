@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import User, Event, AttendanceRecord, Enrollment
+from .models import User, Event, AttendanceRecord, AttendanceSummary, Enrollment
+from .services.embedding_store import has_face_embedding
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -10,7 +11,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'password', 'role', 'phone', 'has_face_enrolled', 'is_email_verified')
 
     def get_has_face_enrolled(self, obj):
-        return obj.face_embedding is not None and len(obj.face_embedding) > 0
+        return has_face_embedding(obj)
 
     def create(self, validated_data):
         user = User.objects.create_user(**validated_data)
@@ -29,6 +30,12 @@ class AttendanceSerializer(serializers.ModelSerializer):
     class Meta:
         model = AttendanceRecord
         fields = '__all__'
+        read_only_fields = ('date', 'time')
+
+class AttendanceSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AttendanceSummary
+        fields = ('event', 'date', 'enrolled_count', 'present_count', 'late_count', 'absent_count', 'mean_confidence')
 
 class EnrollmentSerializer(serializers.ModelSerializer):
     event = EventSerializer(read_only=True)  # Nested representation for easy frontend consumption
@@ -0,0 +1,95 @@
+"""
+Attendance Service
+Writes attendance records for recognized students, shared by the HTTP views
+and the live WebSocket stream.
+"""
+import datetime
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from .summary_service import refresh_attendance_summary
+
+logger = logging.getLogger(__name__)
+
+
+def attendance_status_for(event, now=None) -> str:
+    """
+    'late' once the event's duration has passed, 'present' before that.
+    """
+    now = now or timezone.now()
+    event_datetime = timezone.make_aware(
+        datetime.datetime.combine(event.date, event.time)
+    )
+    return 'late' if now > event_datetime + event.duration else 'present'
+
+
+def mark_batch_matches(event, matches: list) -> list:
+    """
+    Mark attendance for every student matched in a frame.
+
+    The whole frame is written set-based: one query for the students, one for
+    the records already marked today, one bulk INSERT for the rest and one
+    attendance summary refresh, in a single transaction. Rows inserted concurrently by another request are
+    skipped via the (event, student, date) unique key.
+    
+    Args:
+        event: Event being attended
+        matches: Output of recognize_faces_in_image, [{'user_id': id, 'confidence': score}, ...]
+        
+    Returns:
+        List of per-student results: student, status (marked/already_marked), time, confidence
+    """
+    from api.models import AttendanceRecord, User
+
+    # A student can only be marked once per frame
+    confidence_by_student = {}
+    for match in matches:
+        confidence_by_student.setdefault(match['user_id'], match['confidence'])
+    if not confidence_by_student:
+        return []
+
+    today = datetime.date.today()
+    status_val = attendance_status_for(event)
+
+    with transaction.atomic():
+        student_map = User.objects.in_bulk(list(confidence_by_student))
+        existing = {
+            record.student_id: record
+            for record in AttendanceRecord.objects.filter(
+                event=event, date=today, student_id__in=list(confidence_by_student)
+            ).only('id', 'student_id', 'time')
+        }
+
+        new_records = [
+            AttendanceRecord(
+                student_id=student_id,
+                event=event,
+                date=today,
+                status=status_val,
+                confidence_score=confidence,
+            )
+            for student_id, confidence in confidence_by_student.items()
+            if student_id not in existing and student_id in student_map
+        ]
+        AttendanceRecord.objects.bulk_create(new_records, ignore_conflicts=True)
+        if new_records:
+            # bulk_create sends no post_save signals
+            refresh_attendance_summary(event.id, today)
+    created = {record.student_id: record for record in new_records}
+
+    results = []
+    for student_id, confidence in confidence_by_student.items():
+        student = student_map.get(student_id)
+        if student is None:
+            continue
+        record = created.get(student_id) or existing[student_id]
+        results.append({
+            "student": student.username,
+            "status": "marked" if student_id in created else "already_marked",
+            "time": record.time.strftime("%I:%M %p"),
+            "confidence": round(confidence, 2)
+        })
+        
+    return results
@@ -0,0 +1,220 @@
+"""
+Attendance Spool
+Write-behind journal for mark_live (ATTENDANCE_WRITE_MODE = 'spool').
+
+With the default SQLite database a whole class marking attendance at once
+queues up on the database write lock and requests fail with "database is
+locked". In spool mode a recognized attendance is appended to a small journal
+instead: a separate SQLite file in WAL mode, synchronous=FULL, one tiny insert
+per student, so the student gets their answer at once and the entry survives
+a crash. A background flusher thread moves journal entries into
+AttendanceRecord in batches (one transaction, bulk_create with
+ignore_conflicts on (event, student, date)), and removes them from the journal
+only after that commit. A flush interrupted by a crash is simply redone; the
+unique key makes it idempotent.
+
+python manage.py flush_attendance_spool drains the journal by hand (e.g. on
+deploy, or from cron when the flusher thread is disabled).
+"""
+import atexit
+import datetime
+import sqlite3
+import threading
+import time
+import logging
+from collections import namedtuple
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .summary_service import refresh_attendance_summary
+
+logger = logging.getLogger(__name__)
+
+SpooledAttendance = namedtuple(
+    'SpooledAttendance', 'id event_id student_id date time status confidence_score'
+)
+
+
+class AttendanceSpool:
+    """
+    Durable journal of attendance waiting to be written to the database.
+
+    Args:
+        path: SQLite file holding the journal
+        busy_timeout: Seconds to wait for the journal's own write lock
+    """
+
+    def __init__(self, path, busy_timeout: float = 5.0):
+        self.path = str(path)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS spooled_attendance (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    event_id INTEGER NOT NULL,
+                    student_id INTEGER NOT NULL,
+                    date TEXT NOT NULL,
+                    time TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    confidence_score REAL NOT NULL,
+                    UNIQUE (event_id, student_id, date)
+                )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+        return conn
+
+    def append(self, event_id: int, student_id: int, date: datetime.date, time_of_day: datetime.time,
+               status: str, confidence_score: float) -> Optional[datetime.time]:
+        """
+        Journal one attendance.
+
+        Returns:
+            None when the entry was added, or the time of the entry already
+            waiting for this (event, student, date)
+        """
+        conn = self._connect()
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO spooled_attendance "
+            "(event_id, student_id, date, time, status, confidence_score) VALUES (?, ?, ?, ?, ?, ?)",
+            (event_id, student_id, date.isoformat(), time_of_day.isoformat(), status, confidence_score)
+        )
+        if cursor.rowcount:
+            return None
+        row = conn.execute(
+            "SELECT time FROM spooled_attendance WHERE event_id = ? AND student_id = ? AND date = ?",
+            (event_id, student_id, date.isoformat())
+        ).fetchone()
+        return datetime.time.fromisoformat(row[0]) if row else None
+
+    def pending(self, limit: int = 500) -> List[SpooledAttendance]:
+        rows = self._connect().execute(
+            "SELECT id, event_id, student_id, date, time, status, confidence_score "
+            "FROM spooled_attendance ORDER BY id LIMIT ?", (limit,)
+        ).fetchall()
+        return [
+            SpooledAttendance(row[0], row[1], row[2], datetime.date.fromisoformat(row[3]),
+                              datetime.time.fromisoformat(row[4]), row[5], row[6])
+            for row in rows
+        ]
+
+    def remove(self, ids: List[int]) -> None:
+        if ids:
+            self._connect().executemany("DELETE FROM spooled_attendance WHERE id = ?", [(i,) for i in ids])
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM spooled_attendance").fetchone()[0]
+
+
+def flush_spool(spool: AttendanceSpool, batch_size: Optional[int] = None) -> int:
+    """
+    Move journal entries into AttendanceRecord, batch_size at a time, until the journal is empty.
+
+    Returns:
+        Number of journal entries flushed
+    """
+    from api.models import AttendanceRecord
+
+    batch_size = batch_size or getattr(settings, 'ATTENDANCE_SPOOL_BATCH_SIZE', 500)
+    flushed = 0
+    while True:
+        entries = spool.pending(batch_size)
+        if not entries:
+            return flushed
+
+        with transaction.atomic():
+            AttendanceRecord.objects.bulk_create([
+                AttendanceRecord(
+                    event_id=entry.event_id,
+                    student_id=entry.student_id,
+                    date=entry.date,
+                    time=entry.time,
+                    status=entry.status,
+                    confidence_score=entry.confidence_score,
+                )
+                for entry in entries
+            ], ignore_conflicts=True)
+            # bulk_create sends no post_save signals
+            for event_id, date in {(entry.event_id, entry.date) for entry in entries}:
+                refresh_attendance_summary(event_id, date)
+        # Only forget entries once they are committed
+        spool.remove([entry.id for entry in entries])
+        flushed += len(entries)
+
+
+class SpoolFlusher(threading.Thread):
+    """
+    Daemon thread flushing the journal every `interval` seconds.
+    """
+
+    def __init__(self, spool: AttendanceSpool, interval: float):
+        super().__init__(name='attendance-spool-flusher', daemon=True)
+        self.spool = spool
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.flush_once()
+
+    def flush_once(self):
+        close_old_connections()
+        try:
+            flushed = flush_spool(self.spool)
+            if flushed:
+                logger.info(f"Flushed {flushed} spooled attendance records")
+        except Exception as e:
+            # Entries stay in the journal and are retried on the next tick
+            logger.warning(f"Attendance spool flush failed: {str(e)}")
+        finally:
+            close_old_connections()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_spool: Optional[AttendanceSpool] = None
+_flusher: Optional[SpoolFlusher] = None
+_spool_lock = threading.Lock()
+
+
+def spool_enabled() -> bool:
+    return getattr(settings, 'ATTENDANCE_WRITE_MODE', 'direct') == 'spool'
+
+
+def get_attendance_spool() -> AttendanceSpool:
+    """
+    Return the process-wide spool, starting its flusher thread on first use
+    (unless ATTENDANCE_SPOOL_FLUSH_INTERVAL is 0).
+    """
+    global _spool, _flusher
+    with _spool_lock:
+        if _spool is None:
+            _spool = AttendanceSpool(settings.ATTENDANCE_SPOOL_PATH)
+            interval = getattr(settings, 'ATTENDANCE_SPOOL_FLUSH_INTERVAL', 1.0)
+            if interval > 0:
+                _flusher = SpoolFlusher(_spool, interval)
+                _flusher.start()
+                # Last chance to write what is still journaled on a clean shutdown
+                atexit.register(_flusher.flush_once)
+                atexit.register(_flusher.stop)
+        return _spool
+
+
+def reset_attendance_spool() -> None:
+    """Stop the flusher and forget the spool (tests, settings changes)."""
+    global _spool, _flusher
+    with _spool_lock:
+        if _flusher is not None:
+            _flusher.stop()
+        _spool = None
+        _flusher = None
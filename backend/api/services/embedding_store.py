@@ -0,0 +1,261 @@
+"""
+Face Embedding Store
+Compact, versioned serialization of face embeddings and access to the
+FaceEmbedding table that holds them (kept off the auth user table).
+
+Blob layout (little-endian):
+    magic      4s   b'FEMB'
+    version    B    format version (1)
+    dtype      B    1 = float16, 2 = float32, 3 = float64
+    dimension  H    number of components (128 for dlib)
+    model_id   H    encoder that produced the vector (see MODEL_* constants)
+    norm       f    L2 norm of the original float64 vector
+    payload         dimension * itemsize bytes
+
+Blobs written before the store existed are raw float64 arrays without a header;
+they are still decoded for backwards compatibility.
+"""
+import struct
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Dimension of face_recognition (dlib) encodings
+EMBEDDING_DIM = 128
+
+MAGIC = b'FEMB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBHHf')
+
+# Encoders
+MODEL_HASH_FALLBACK = 0
+MODEL_DLIB_RESNET_V1 = 1
+
+_DTYPE_CODES = {
+    'float16': 1,
+    'float32': 2,
+    'float64': 3,
+}
+_CODE_DTYPES = {code: np.dtype(name) for name, code in _DTYPE_CODES.items()}
+
+
+def _storage_dtype() -> str:
+    return getattr(settings, 'FACE_EMBEDDING_DTYPE', 'float32')
+
+
+def encode_embedding(encoding: np.ndarray, model_id: int = MODEL_DLIB_RESNET_V1, dtype: Optional[str] = None) -> bytes:
+    """
+    Serialize a face encoding as header + compact payload.
+
+    Args:
+        encoding: 1-d face encoding
+        model_id: Encoder that produced the encoding
+        dtype: Storage dtype name, defaults to settings.FACE_EMBEDDING_DTYPE
+
+    Returns:
+        Blob suitable for FaceEmbedding.data
+    """
+    dtype = dtype or _storage_dtype()
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported embedding dtype '{dtype}'")
+
+    vector = np.asarray(encoding, dtype=np.float64).ravel()
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, _DTYPE_CODES[dtype], len(vector), model_id, float(np.linalg.norm(vector)))
+    return header + vector.astype(dtype).tobytes()
+
+
+def decode_header(blob: bytes) -> Optional[dict]:
+    """
+    Read the header of a blob.
+
+    Returns:
+        Dict with version, dtype, dimension, model_id and norm, or None for legacy raw blobs
+    """
+    if len(blob) < HEADER.size or bytes(blob[:4]) != MAGIC:
+        return None
+    _, version, dtype_code, dimension, model_id, norm = HEADER.unpack_from(blob)
+    return {
+        'version': version,
+        'dtype': _CODE_DTYPES.get(dtype_code),
+        'dimension': dimension,
+        'model_id': model_id,
+        'norm': norm,
+    }
+
+
+def decode_embedding(blob) -> np.ndarray:
+    """
+    Decode a stored blob back to a float64 encoding.
+
+    Raises:
+        ValueError: If the blob is empty, truncated or of an unknown format
+    """
+    if blob is None or len(blob) == 0:
+        raise ValueError("Empty face embedding")
+    blob = bytes(blob)
+
+    header = decode_header(blob)
+    if header is None:
+        # Legacy format: raw float64 components
+        if len(blob) % 8:
+            raise ValueError(f"Face embedding of {len(blob)} bytes is not a float64 array")
+        return np.frombuffer(blob, dtype=np.float64)
+
+    if header['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported face embedding format version {header['version']}")
+    if header['dtype'] is None:
+        raise ValueError("Unknown face embedding dtype")
+
+    expected = HEADER.size + header['dimension'] * header['dtype'].itemsize
+    if len(blob) != expected:
+        raise ValueError(f"Face embedding is {len(blob)} bytes, expected {expected}")
+
+    return np.frombuffer(blob, dtype=header['dtype'], offset=HEADER.size).astype(np.float64)
+
+
+def save_user_templates(user, encodings, model_id: int = MODEL_DLIB_RESNET_V1) -> list:
+    """
+    Replace a user's face templates with the given encodings (one row each).
+    Any legacy copy on the user row is cleared.
+
+    Args:
+        user: User to enroll
+        encodings: Sequence of 1-d encodings, or a (K, 128) array
+        model_id: Encoder that produced the encodings
+    """
+    from api.models import FaceEmbedding
+
+    with transaction.atomic():
+        FaceEmbedding.objects.filter(user=user).delete()
+        records = FaceEmbedding.objects.bulk_create([
+            FaceEmbedding(user=user, data=encode_embedding(encoding, model_id=model_id))
+            for encoding in encodings
+        ])
+        if user.face_embedding:
+            user.face_embedding = None
+            user.save(update_fields=['face_embedding'])
+    return records
+
+
+def save_user_embedding(user, encoding: np.ndarray, model_id: int = MODEL_DLIB_RESNET_V1):
+    """
+    Store (or replace) a user's face embedding as their single template.
+    """
+    return save_user_templates(user, [encoding], model_id=model_id)[0]
+
+
+def delete_user_embedding(user) -> bool:
+    """
+    Remove a user's face embedding, wherever it is stored.
+
+    Returns:
+        True if anything was deleted
+    """
+    from api.models import FaceEmbedding
+
+    deleted, _ = FaceEmbedding.objects.filter(user=user).delete()
+    if user.face_embedding:
+        user.face_embedding = None
+        user.save(update_fields=['face_embedding'])
+        deleted += 1
+    return deleted > 0
+
+
+def load_user_templates(user) -> Optional[np.ndarray]:
+    """
+    Return a user's face templates as a float64 (K, 128) matrix, or None if they
+    have not enrolled (or none of the stored data can be decoded).
+    """
+    from api.models import FaceEmbedding
+
+    blobs = list(FaceEmbedding.objects.filter(user=user).values_list('data', flat=True))
+    if not blobs and user.face_embedding:
+        blobs = [user.face_embedding]
+
+    templates = []
+    for blob in blobs:
+        try:
+            templates.append(decode_embedding(blob))
+        except ValueError as e:
+            logger.warning(f"Invalid face embedding for user {user.pk}: {e}")
+    if not templates:
+        return None
+    try:
+        return np.vstack(templates)
+    except ValueError:
+        logger.warning(f"Face templates of user {user.pk} have mismatched dimensions")
+        return None
+
+
+def load_user_embedding(user) -> Optional[np.ndarray]:
+    """
+    Return a user's first face encoding as float64, or None if they have not enrolled.
+    """
+    templates = load_user_templates(user)
+    return None if templates is None else templates[0]
+
+
+def has_face_embedding(user) -> bool:
+    """True if the user has an enrolled face."""
+    from api.models import FaceEmbedding
+
+    if user.face_embedding:
+        return True
+    return FaceEmbedding.objects.filter(user=user).exists()
+
+
+def _decode_rows(rows) -> Tuple[List[int], List[np.ndarray]]:
+    ids = []
+    vectors = []
+    for user_id, blob in rows:
+        if not blob:
+            continue
+        try:
+            vector = decode_embedding(blob)
+        except ValueError as e:
+            logger.warning(f"Skipping invalid face embedding for user {user_id}: {e}")
+            continue
+        if len(vector) != EMBEDDING_DIM:
+            logger.warning(f"Skipping {len(vector)}-d face embedding for user {user_id}")
+            continue
+        ids.append(user_id)
+        vectors.append(vector)
+    return ids, vectors
+
+
+def load_embeddings(user_filter: Optional[Dict] = None) -> Tuple[List[int], List[np.ndarray]]:
+    """
+    Load decoded embeddings of many users at once.
+
+    Only the user id and embedding columns are read: the auth user table is touched
+    only for legacy embeddings that have not been migrated to FaceEmbedding yet.
+
+    Args:
+        user_filter: Lookups applied to the User model (e.g. {'enrollments__event_id': 3}),
+                     or None for every user
+
+    Returns:
+        (user_ids, vectors) lists, row-aligned; a user with several templates
+        appears once per template
+    """
+    from api.models import FaceEmbedding, User
+
+    user_filter = user_filter or {}
+    rows = list(
+        FaceEmbedding.objects
+        .filter(**{f'user__{lookup}': value for lookup, value in user_filter.items()})
+        .values_list('user_id', 'data')
+    )
+    legacy_rows = (
+        User.objects
+        .filter(**user_filter)
+        .filter(face_embedding__isnull=False, face_templates__isnull=True)
+        .values_list('id', 'face_embedding')
+    )
+    rows.extend(legacy_rows)
+    return _decode_rows(rows)
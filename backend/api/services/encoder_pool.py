@@ -0,0 +1,163 @@
+"""
+Face Encoder Pool
+Runs CPU-bound dlib face detection/encoding in a pool of warm worker processes,
+so a slow detection does not hold a Django request thread and throughput scales
+with cores.
+
+The pool is bounded: when FACE_ENCODER_MAX_PENDING jobs are already queued or
+running, new jobs wait at most FACE_ENCODER_QUEUE_WAIT seconds for a slot and
+then fail with EncoderBusy, which views turn into 503 responses.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import logging
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FaceEncoderUnavailable(Exception):
+    """The encoder pool could not run a job right now."""
+
+
+class EncoderBusy(FaceEncoderUnavailable):
+    """Too many encoding jobs are already pending."""
+
+
+class EncoderTimeout(FaceEncoderUnavailable):
+    """An encoding job did not finish in time."""
+
+
+def warm_up_worker():
+    """
+    Worker initializer: load the dlib models once per process instead of per job.
+    """
+    try:
+        import numpy as np
+        import face_recognition
+        face_recognition.face_locations(np.zeros((32, 32, 3), dtype=np.uint8))
+    except Exception as e:
+        logger.warning(f"Face encoder worker {os.getpid()} started without face_recognition: {e}")
+
+
+class FaceEncoderPool:
+    """
+    Bounded process pool for face encoding jobs.
+
+    Args:
+        workers: Number of worker processes
+        max_pending: Maximum number of jobs queued or running at once
+        timeout: Seconds to wait for a job result
+        queue_wait: Seconds to wait for a free slot before giving up
+        start_method: multiprocessing start method ('spawn' is safe in threaded servers)
+        initializer: Function run once in every worker process
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float = 10.0, queue_wait: float = 0.5,
+                 start_method: str = 'spawn', initializer: Optional[Callable] = warm_up_worker):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.queue_wait = queue_wait
+        self._start_method = start_method
+        self._initializer = initializer
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self._start_method),
+                    initializer=self._initializer,
+                )
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn: Callable, *args, timeout: Optional[float] = None):
+        """
+        Run fn(*args) in a worker process and return its result.
+
+        Raises:
+            EncoderBusy: If no slot became free within queue_wait seconds
+            EncoderTimeout: If the job did not finish within the timeout
+            FaceEncoderUnavailable: If the worker processes died
+        """
+        if not self._slots.acquire(timeout=self.queue_wait):
+            raise EncoderBusy("Face encoder is busy, please retry")
+        # memoryviews of uploaded frames cannot be pickled to a worker process
+        args = tuple(bytes(arg) if isinstance(arg, memoryview) else arg for arg in args)
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool as e:
+            self._slots.release()
+            self._reset_executor(executor)
+            raise FaceEncoderUnavailable(f"Face encoder workers crashed: {e}")
+        # The slot is held until the job really finishes, even if the caller gives up on it
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise EncoderTimeout("Face encoding timed out")
+        except BrokenProcessPool as e:
+            self._reset_executor(executor)
+            raise FaceEncoderUnavailable(f"Face encoder workers crashed: {e}")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[FaceEncoderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_encoder_pool() -> Optional[FaceEncoderPool]:
+    """
+    Return the process-wide encoder pool, or None when FACE_ENCODER_WORKERS is 0
+    (jobs then run inline in the request thread).
+    """
+    global _pool
+    workers = getattr(settings, 'FACE_ENCODER_WORKERS', 0)
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = FaceEncoderPool(
+                workers=workers,
+                max_pending=getattr(settings, 'FACE_ENCODER_MAX_PENDING', workers * 4),
+                timeout=getattr(settings, 'FACE_ENCODER_TIMEOUT', 10.0),
+                queue_wait=getattr(settings, 'FACE_ENCODER_QUEUE_WAIT', 0.5),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def run_encoder_job(fn: Callable, *args):
+    """
+    Run a face encoding job through the pool when it is enabled, inline otherwise.
+    fn must be a module-level function so it can be sent to a worker process.
+    """
+    pool = get_encoder_pool()
+    if pool is None:
+        return fn(*args)
+    return pool.run(fn, *args)
@@ -0,0 +1,242 @@
+"""
+Face Identification Index
+Approximate nearest-neighbour search over every enrolled face, used for
+open (1:N) identification when no event or user is known up front.
+
+The index is an inverted file (IVF): embeddings are partitioned around k-means
+centroids and a query only scans the few partitions whose centroids are closest.
+"""
+import math
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+
+from .embedding_store import EMBEDDING_DIM, load_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def _squared_distances(queries: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Squared Euclidean distances between rows of queries (Q, D) and points (P, D)."""
+    distances = (
+        np.einsum('ij,ij->i', queries, queries)[:, np.newaxis]
+        - 2.0 * queries @ points.T
+        + np.einsum('ij,ij->i', points, points)[np.newaxis, :]
+    )
+    return np.maximum(distances, 0.0)
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Plain Lloyd's k-means with k-means++ seeding.
+
+    Args:
+        vectors: Training vectors, shape (N, D)
+        k: Number of centroids (clamped to N)
+        iterations: Number of Lloyd iterations
+        seed: Random seed, so rebuilding the same data gives the same partitions
+
+    Returns:
+        Centroids, shape (k, D)
+    """
+    rng = np.random.default_rng(seed)
+    k = max(1, min(k, len(vectors)))
+
+    # k-means++ seeding
+    centroids = np.empty((k, vectors.shape[1]), dtype=np.float64)
+    centroids[0] = vectors[rng.integers(len(vectors))]
+    closest = _squared_distances(vectors, centroids[:1])[:, 0]
+    for i in range(1, k):
+        total = closest.sum()
+        if total <= 0:
+            centroids[i:] = vectors[rng.integers(len(vectors), size=k - i)]
+            break
+        centroids[i] = vectors[rng.choice(len(vectors), p=closest / total)]
+        closest = np.minimum(closest, _squared_distances(vectors, centroids[i:i + 1])[:, 0])
+
+    for _ in range(iterations):
+        labels = np.argmin(_squared_distances(vectors, centroids), axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        non_empty = counts > 0
+        centroids[non_empty] = sums[non_empty] / counts[non_empty, np.newaxis]
+
+    return centroids
+
+
+class FaceIndex:
+    """
+    IVF index of face embeddings keyed by user id. A user may have several
+    vectors (templates); searches return each user once, at their closest vector.
+
+    Small indexes (below ``exact_below`` vectors) are searched exhaustively; the
+    partitions are only trained once the index grows past that size, and are
+    retrained when it doubles. Inserts and deletes are incremental.
+    """
+
+    def __init__(self, n_probe: int = 8, exact_below: int = 2048):
+        self.n_probe = n_probe
+        self.exact_below = exact_below
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        # One (ids, vectors) pair per partition; a single partition while untrained
+        self._list_ids: List[np.ndarray] = [np.empty(0, dtype=np.int64)]
+        self._list_vectors: List[np.ndarray] = [np.empty((0, EMBEDDING_DIM), dtype=np.float64)]
+        # user id -> partitions holding their vectors
+        self._owner: Dict[int, Set[int]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._owner)
+
+    def __contains__(self, user_id) -> bool:
+        return int(user_id) in self._owner
+
+    def build(self, ids, vectors) -> None:
+        """Replace the index content with the given ids and (N, 128) vectors; ids may repeat."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, EMBEDDING_DIM)
+        with self._lock:
+            if len(ids) >= self.exact_below:
+                self.centroids = kmeans(vectors, int(math.sqrt(len(ids))))
+                labels = np.argmin(_squared_distances(vectors, self.centroids), axis=1)
+            else:
+                self.centroids = None
+                labels = np.zeros(len(ids), dtype=np.int64)
+
+            list_count = 1 if self.centroids is None else len(self.centroids)
+            self._list_ids = []
+            self._list_vectors = []
+            for label in range(list_count):
+                members = labels == label
+                self._list_ids.append(ids[members])
+                self._list_vectors.append(np.ascontiguousarray(vectors[members]))
+            self._owner = {}
+            for user_id, label in zip(ids.tolist(), labels.tolist()):
+                self._owner.setdefault(user_id, set()).add(label)
+            self.trained_size = len(ids)
+
+    @property
+    def vector_count(self) -> int:
+        return sum(len(ids) for ids in self._list_ids)
+
+    def add(self, user_id: int, vectors: np.ndarray) -> None:
+        """Insert or replace the embedding(s) of one user; vectors is (128,) or (K, 128)."""
+        user_id = int(user_id)
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, EMBEDDING_DIM)
+        with self._lock:
+            self.remove(user_id)
+            if self.centroids is None:
+                labels = np.zeros(len(vectors), dtype=np.int64)
+            else:
+                labels = np.argmin(_squared_distances(vectors, self.centroids), axis=1)
+            for vector, label in zip(vectors, labels.tolist()):
+                self._list_ids[label] = np.append(self._list_ids[label], user_id)
+                self._list_vectors[label] = np.vstack([self._list_vectors[label], vector])
+                self._owner.setdefault(user_id, set()).add(label)
+            if self.vector_count >= max(self.exact_below, 2 * self.trained_size):
+                self._retrain()
+
+    def remove(self, user_id: int) -> None:
+        """Delete the embedding(s) of one user, if present."""
+        user_id = int(user_id)
+        with self._lock:
+            labels = self._owner.pop(user_id, None)
+            if labels is None:
+                return
+            for label in labels:
+                keep = self._list_ids[label] != user_id
+                self._list_ids[label] = self._list_ids[label][keep]
+                self._list_vectors[label] = self._list_vectors[label][keep]
+
+    def _retrain(self) -> None:
+        ids = np.concatenate(self._list_ids)
+        vectors = np.vstack(self._list_vectors)
+        self.build(ids, vectors)
+
+    def search(self, vector: np.ndarray, k: int = 1) -> List[Tuple[int, float]]:
+        """
+        Find the k nearest enrolled users of an embedding.
+
+        Returns:
+            List of (user_id, distance) tuples, closest first
+        """
+        query = np.asarray(vector, dtype=np.float64).reshape(1, EMBEDDING_DIM)
+        with self._lock:
+            if self.centroids is None:
+                probes = [0]
+            else:
+                centroid_distances = _squared_distances(query, self.centroids)[0]
+                n_probe = min(self.n_probe, len(centroid_distances))
+                probes = np.argpartition(centroid_distances, n_probe - 1)[:n_probe]
+            candidate_ids = np.concatenate([self._list_ids[p] for p in probes])
+            candidate_vectors = np.vstack([self._list_vectors[p] for p in probes])
+
+        if len(candidate_ids) == 0:
+            return []
+
+        distances = np.sqrt(_squared_distances(query, candidate_vectors)[0])
+        order = np.argsort(distances, kind='stable')
+        # First occurrence of each id in distance order is that user's closest template
+        _, first = np.unique(candidate_ids[order], return_index=True)
+        nearest = order[np.sort(first)][:k]
+        return [(int(candidate_ids[i]), float(distances[i])) for i in nearest]
+
+
+_index: Optional[FaceIndex] = None
+_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _load_index() -> FaceIndex:
+    ids, vectors = load_embeddings()
+
+    index = FaceIndex(
+        n_probe=getattr(settings, 'FACE_INDEX_N_PROBE', 8),
+        exact_below=getattr(settings, 'FACE_INDEX_EXACT_BELOW', 2048),
+    )
+    index.build(ids, np.vstack(vectors) if vectors else np.empty((0, EMBEDDING_DIM)))
+    logger.info(f"Built face identification index with {len(index)} embeddings")
+    return index
+
+
+def get_identification_index() -> FaceIndex:
+    """
+    Return the process-wide identification index, building it on first use and
+    rebuilding it after FACE_INDEX_TTL seconds so other workers' changes show up.
+    """
+    global _index, _built_at
+    with _index_lock:
+        ttl = float(getattr(settings, 'FACE_INDEX_TTL', 3600))
+        if _index is None or time.monotonic() - _built_at >= ttl:
+            _index = _load_index()
+            _built_at = time.monotonic()
+        return _index
+
+
+def update_user_in_index(user_id: int, encoding: Optional[np.ndarray]) -> None:
+    """
+    Keep an already built index in sync with a changed face embedding.
+    encoding may be one vector or a (K, 128) template matrix; pass None when
+    the user's face has been removed.
+    """
+    with _index_lock:
+        index = _index
+    if index is None:
+        return
+    if encoding is None:
+        index.remove(user_id)
+    else:
+        index.add(user_id, encoding)
+
+
+def reset_identification_index() -> None:
+    """Forget the built index; the next lookup reloads it from the database."""
+    global _index
+    with _index_lock:
+        _index = None
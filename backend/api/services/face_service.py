@@ -4,9 +4,23 @@ Handles face encoding and comparison for biometric attendance system.
 """
 import base64
 import io
+import math
 import numpy as np
 from typing import Optional, Tuple
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from .embedding_store import (
+    EMBEDDING_DIM,
+    MODEL_DLIB_RESNET_V1,
+    MODEL_HASH_FALLBACK,
+    decode_embedding,
+    encode_embedding,
+)
+from .encoder_pool import FaceEncoderUnavailable, run_encoder_job
+from .gallery_cache import EventGallery
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +32,9 @@ except ImportError:
     FACE_RECOGNITION_AVAILABLE = False
     logger.warning("face_recognition library not available. Using fallback method.")
 
+# Encoder recorded in the header of newly stored embeddings
+CURRENT_MODEL_ID = MODEL_DLIB_RESNET_V1 if FACE_RECOGNITION_AVAILABLE else MODEL_HASH_FALLBACK
+
 # Try to import PIL for image processing
 try:
     from PIL import Image
@@ -27,45 +44,159 @@ except ImportError:
     logger.warning("PIL/Pillow not available. Some image processing may fail.")
 
 
+def decode_image_data(image_data):
+    """
+    Return the encoded image bytes of a frame.
+    
+    Base64 strings (optionally data URLs) are decoded; bytes and memoryviews from
+    binary uploads are returned as they are, without copying.
+    """
+    if isinstance(image_data, str):
+        if ',' in image_data:
+            # Remove data URL prefix if present (e.g., "data:image/jpeg;base64,...")
+            image_data = image_data.split(',')[-1]
+        return base64.b64decode(image_data)
+    return image_data
+
+
+def _image_stream(image_bytes) -> io.BytesIO:
+    # BytesIO shares (rather than copies) a bytes object, so unwrap whole-buffer memoryviews
+    if isinstance(image_bytes, memoryview) and isinstance(image_bytes.obj, bytes) \
+            and image_bytes.nbytes == len(image_bytes.obj):
+        image_bytes = image_bytes.obj
+    return io.BytesIO(image_bytes)
+
+
+def load_image_for_detection(image_bytes: bytes, detect_max_side: int = 0,
+                             encode_max_side: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decode an image once into a full-resolution array for encoding and a
+    downscaled array for face detection (HOG cost grows with pixel count).
+    
+    JPEGs larger than encode_max_side are decoded straight at a reduced DCT scale
+    with Image.draft(); the detection copy is made with Image.reduce().
+    
+    Args:
+        image_bytes: Encoded image (JPEG, PNG, ...)
+        detect_max_side: Longest side of the detection image (0 = no downscaling)
+        encode_max_side: Longest side worth decoding for encoding (0 = full size)
+        
+    Returns:
+        Tuple of (full RGB array, detection RGB array)
+    """
+    if not PIL_AVAILABLE:
+        image = face_recognition.load_image_file(_image_stream(image_bytes))
+        return image, image
+
+    image = Image.open(_image_stream(image_bytes))
+    if image.format == 'JPEG' and encode_max_side and max(image.size) > encode_max_side:
+        # Keeps at least encode_max_side pixels on the long side
+        ratio = encode_max_side / max(image.size)
+        image.draft('RGB', (math.ceil(image.width * ratio), math.ceil(image.height * ratio)))
+    image = image.convert('RGB')
+    full = np.asarray(image)
+
+    if detect_max_side and max(image.size) > detect_max_side:
+        factor = math.ceil(max(image.size) / detect_max_side)
+        return full, np.asarray(image.reduce(factor))
+
+    return full, full
+
+
+def scale_face_locations(face_locations: list, detect_shape: tuple, full_shape: tuple) -> list:
+    """
+    Map (top, right, bottom, left) boxes found on the detection image back onto
+    the full-resolution image.
+    """
+    if detect_shape[:2] == full_shape[:2]:
+        return list(face_locations)
+    scale_y = full_shape[0] / detect_shape[0]
+    scale_x = full_shape[1] / detect_shape[1]
+    height, width = full_shape[:2]
+    return [
+        (
+            max(0, int(round(top * scale_y))),
+            min(width, int(round(right * scale_x))),
+            min(height, int(round(bottom * scale_y))),
+            max(0, int(round(left * scale_x))),
+        )
+        for top, right, bottom, left in face_locations
+    ]
+
+
+def detect_faces(image_bytes: bytes, detect_max_side: int = 0, encode_max_side: int = 0) -> Tuple[np.ndarray, list]:
+    """
+    Find faces on a downscaled copy of the image.
+    
+    Returns:
+        Tuple of (full-resolution image, face locations in full-resolution coordinates)
+    """
+    image, detect_image = load_image_for_detection(image_bytes, detect_max_side, encode_max_side)
+    face_locations = face_recognition.face_locations(detect_image)
+    return image, scale_face_locations(face_locations, detect_image.shape, image.shape)
+
+
+def detect_and_encode_first_face(image_bytes: bytes, detect_max_side: int = 0,
+                                 encode_max_side: int = 0) -> Optional[np.ndarray]:
+    """
+    Detect faces in an encoded image and return the encoding of the first one.
+    Runs inside encoder pool workers; requires face_recognition.
+    """
+    # Find face locations on the downscaled image
+    image, face_locations = detect_faces(image_bytes, detect_max_side, encode_max_side)
+    
+    if not face_locations:
+        logger.warning("No face detected in image")
+        return None
+    
+    # Get face encodings (128-dimensional vector); landmarks use the full-resolution crop
+    face_encodings = face_recognition.face_encodings(image, face_locations[:1])
+    
+    if not face_encodings:
+        logger.warning("Could not encode face")
+        return None
+    
+    # Return the first face encoding
+    return face_encodings[0]
+
+
+def detect_and_encode_all_faces(image_bytes: bytes, detect_max_side: int = 0,
+                                encode_max_side: int = 0) -> list:
+    """
+    Detect and encode every face in an encoded image.
+    Runs inside encoder pool workers; requires face_recognition.
+    """
+    image, face_locations = detect_faces(image_bytes, detect_max_side, encode_max_side)
+    if not face_locations:
+        return []
+    return face_recognition.face_encodings(image, face_locations)
+
+
 def encode_face_from_base64(image_data: str) -> Optional[np.ndarray]:
     """
     Encode a face from a base64 image string.
     
     Args:
-        image_data: Base64 encoded image string (may include data URL prefix)
+        image_data: Base64 encoded image string (may include data URL prefix),
+                    or the raw image bytes/memoryview of a binary upload
         
     Returns:
         Face encoding as numpy array, or None if no face found or error
+        
+    Raises:
+        FaceEncoderUnavailable: If the encoder pool is saturated or timed out
     """
     try:
-        # Decode base64 image
-        if ',' in image_data:
-            # Remove data URL prefix if present (e.g., "data:image/jpeg;base64,...")
-            image_data = image_data.split(',')[-1]
-        
-        image_bytes = base64.b64decode(image_data)
+        image_bytes = decode_image_data(image_data)
         
         if FACE_RECOGNITION_AVAILABLE:
-            # Use face_recognition library
-            # Load image from bytes
-            image = face_recognition.load_image_file(io.BytesIO(image_bytes))
-            
-            # Find face locations
-            face_locations = face_recognition.face_locations(image)
-            
-            if not face_locations:
-                logger.warning("No face detected in image")
-                return None
-            
-            # Get face encodings (128-dimensional vector)
-            face_encodings = face_recognition.face_encodings(image, face_locations)
-            
-            if not face_encodings:
-                logger.warning("Could not encode face")
-                return None
-            
-            # Return the first face encoding
-            return face_encodings[0]
+            # Use face_recognition library, in a pooled worker process when enabled
+            return run_encoder_job(
+                detect_and_encode_first_face,
+                image_bytes,
+                getattr(settings, 'FACE_DETECTION_MAX_SIDE', 640),
+                getattr(settings, 'FACE_ENCODE_MAX_SIDE', 1920),
+            )
         else:
             # Fallback: Use a hash-based approach (less secure but works without face_recognition)
             # This is a simple fallback - for production, face_recognition should be installed
@@ -83,6 +214,8 @@ def encode_face_from_base64(image_data: str) -> Optional[np.ndarray]:
             
             return encoding
             
+    except FaceEncoderUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error encoding face: {str(e)}")
         return None
@@ -93,7 +226,8 @@ def compare_faces(known_encoding: bytes, unknown_encoding: np.ndarray, tolerance
     Compare a known face encoding (stored in DB) with an unknown face encoding.
     
     Args:
-        known_encoding: Face encoding stored in database (as bytes)
+        known_encoding: Face encoding stored in database (as bytes), or a (K, 128)
+                        matrix of templates; the closest template decides the match
         unknown_encoding: Face encoding from current image (as numpy array)
         tolerance: How much distance between faces to consider it a match (default 0.6)
                    Lower values are more strict
@@ -103,23 +237,23 @@ def compare_faces(known_encoding: bytes, unknown_encoding: np.ndarray, tolerance
     """
     try:
         # Convert known_encoding from bytes back to numpy array
-        if isinstance(known_encoding, bytes):
-            known_encoding_array = np.frombuffer(known_encoding, dtype=np.float64)
+        if isinstance(known_encoding, (bytes, memoryview)):
+            known_encoding_array = bytes_to_face_encoding(known_encoding)
         else:
             known_encoding_array = np.array(known_encoding)
         
-        # Ensure both are numpy arrays
-        known_encoding_array = np.array(known_encoding_array)
+        # Ensure both are numpy arrays; templates become rows of a matrix
+        known_encoding_array = np.atleast_2d(np.array(known_encoding_array))
         unknown_encoding_array = np.array(unknown_encoding)
         
-        # Calculate Euclidean distance between encodings
+        # Calculate Euclidean distance to the closest template
         if FACE_RECOGNITION_AVAILABLE:
             # Use face_recognition's built-in comparison
-            distance = face_recognition.face_distance([known_encoding_array], unknown_encoding_array)[0]
+            distance = face_recognition.face_distance(known_encoding_array, unknown_encoding_array).min()
             is_match = distance <= tolerance
         else:
             # Fallback: Calculate Euclidean distance manually
-            distance = np.linalg.norm(known_encoding_array - unknown_encoding_array)
+            distance = np.linalg.norm(known_encoding_array - unknown_encoding_array, axis=1).min()
             # For fallback, use a different threshold (hash-based is less accurate)
             is_match = distance <= (tolerance * 10)  # More lenient for fallback
         
@@ -135,6 +269,68 @@ def compare_faces(known_encoding: bytes, unknown_encoding: np.ndarray, tolerance
         return False, 0.0
 
 
+def encode_faces_from_base64(images: list) -> list:
+    """
+    Encode several base64 images concurrently.
+    
+    Args:
+        images: List of base64 encoded image strings
+        
+    Returns:
+        List with one face encoding (or None) per image, in input order
+    """
+    if not images:
+        return []
+    workers = min(len(images), getattr(settings, 'FACE_ENROLL_MAX_WORKERS', 4))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(encode_face_from_base64, images))
+
+
+def aggregate_templates(encodings, mode: str = 'set', max_templates: int = 3,
+                        outlier_distance: float = 0.4) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn several enrollment samples of one person into stored templates.
+    
+    Samples further than outlier_distance from the coordinate-wise median of all
+    samples (blinks, motion blur, a second person in frame) are rejected first.
+    
+    Args:
+        encodings: Sequence of face encodings from the same person
+        mode: 'mean' for a single averaged template, 'set' for up to max_templates
+              diverse samples (farthest-point selection starting from the most typical one)
+        max_templates: Maximum number of templates kept in 'set' mode
+        outlier_distance: Maximum distance of a sample to the median
+        
+    Returns:
+        Tuple of (templates: (K, 128) array, inlier_mask: boolean array over the samples)
+    """
+    samples = np.asarray(encodings, dtype=np.float64).reshape(-1, EMBEDDING_DIM)
+    if len(samples) == 0:
+        return np.empty((0, EMBEDDING_DIM)), np.zeros(0, dtype=bool)
+
+    median = np.median(samples, axis=0)
+    spread = np.linalg.norm(samples - median, axis=1)
+    inliers = spread <= outlier_distance
+    if not inliers.any():
+        # Keep the most typical sample rather than rejecting the whole enrollment
+        inliers[np.argmin(spread)] = True
+    kept = samples[inliers]
+
+    if mode == 'mean':
+        return kept.mean(axis=0, keepdims=True), inliers
+
+    center = kept.mean(axis=0)
+    chosen = [int(np.argmin(np.linalg.norm(kept - center, axis=1)))]
+    closest = np.linalg.norm(kept - kept[chosen[0]], axis=1)
+    while len(chosen) < min(max_templates, len(kept)):
+        candidate = int(np.argmax(closest))
+        if closest[candidate] == 0:
+            break
+        chosen.append(candidate)
+        closest = np.minimum(closest, np.linalg.norm(kept - kept[candidate], axis=1))
+    return kept[chosen], inliers
+
+
 def face_encoding_to_bytes(encoding: np.ndarray) -> bytes:
     """
     Convert face encoding numpy array to bytes for database storage.
@@ -143,9 +339,9 @@ def face_encoding_to_bytes(encoding: np.ndarray) -> bytes:
         encoding: Face encoding as numpy array
         
     Returns:
-        Face encoding as bytes
+        Face encoding as a versioned, compact blob (see embedding_store)
     """
-    return encoding.tobytes()
+    return encode_embedding(encoding, model_id=CURRENT_MODEL_ID)
 
 
 def bytes_to_face_encoding(encoding_bytes: bytes) -> np.ndarray:
@@ -153,21 +349,84 @@ def bytes_to_face_encoding(encoding_bytes: bytes) -> np.ndarray:
     Convert face encoding bytes from database to numpy array.
     
     Args:
-        encoding_bytes: Face encoding as bytes
+        encoding_bytes: Face encoding as bytes (versioned blob or legacy raw float64)
+        
+    Returns:
+        Face encoding as float64 numpy array
+        
+    Raises:
+        ValueError: If the bytes are not a valid face embedding
+    """
+    return decode_embedding(encoding_bytes)
+
+
+def face_distance_matrix(unknown_encodings, known_encodings) -> np.ndarray:
+    """
+    Euclidean distance of every unknown encoding to every known encoding.
+    
+    Args:
+        unknown_encodings: Encodings found in an image, shape (F, 128)
+        known_encodings: Enrolled encodings, shape (N, 128)
         
     Returns:
-        Face encoding as numpy array
+        Distance matrix of shape (F, N)
     """
-    return np.frombuffer(encoding_bytes, dtype=np.float64)
+    unknown = np.asarray(unknown_encodings, dtype=np.float64).reshape(-1, EMBEDDING_DIM)
+    known = np.asarray(known_encodings, dtype=np.float64).reshape(-1, EMBEDDING_DIM)
+    return np.linalg.norm(unknown[:, np.newaxis, :] - known[np.newaxis, :, :], axis=2)
 
 
-def recognize_faces_in_image(image_data: str, known_faces_dict: dict, tolerance: float = 0.6) -> list:
+def assign_faces(distances: np.ndarray, known_ids, tolerance: float = 0.6) -> list:
+    """
+    Greedily pair faces with known users, closest pairs first.
+    
+    Each face is matched to at most one user and each user to at most one face,
+    so two faces resembling the same student cannot both claim them. known_ids may
+    repeat (several templates per user); a user is still only assigned once.
+    
+    Args:
+        distances: Distance matrix of shape (F, N) from face_distance_matrix
+        known_ids: User id of each of the N columns
+        tolerance: Maximum distance for a pair to count as a match
+        
+    Returns:
+        List of (face_index, known_index, distance) tuples ordered by face_index
+    """
+    face_indices, known_indices = np.nonzero(distances <= tolerance)
+    if len(face_indices) == 0:
+        return []
+
+    candidate_distances = distances[face_indices, known_indices]
+    order = np.argsort(candidate_distances, kind='stable')
+
+    assigned_faces = set()
+    assigned_ids = set()
+    pairs = []
+    face_count = distances.shape[0]
+    for i in order:
+        face_index = int(face_indices[i])
+        known_index = int(known_indices[i])
+        user_id = known_ids[known_index]
+        if face_index in assigned_faces or user_id in assigned_ids:
+            continue
+        assigned_faces.add(face_index)
+        assigned_ids.add(user_id)
+        pairs.append((face_index, known_index, float(candidate_distances[i])))
+        if len(assigned_faces) == face_count:
+            break
+
+    pairs.sort()
+    return pairs
+
+
+def recognize_faces_in_image(image_data: str, known_faces_dict, tolerance: float = 0.6) -> list:
     """
     Detect multiple faces in an image and identify them against a dictionary of known faces.
     
     Args:
-        image_data: Base64 string of the image
-        known_faces_dict: Dict mapping {user_id: face_encoding_bytes}
+        image_data: Base64 string of the image, or raw image bytes/memoryview
+        known_faces_dict: Dict mapping {user_id: face_encoding_bytes}, or a cached
+                          EventGallery (see gallery_cache) holding a ready (N, 128) matrix
         tolerance: Distance tolerance for matching
         
     Returns:
@@ -177,56 +436,51 @@ def recognize_faces_in_image(image_data: str, known_faces_dict: dict, tolerance:
     
     try:
         # Decode image
-        if ',' in image_data:
-            image_data = image_data.split(',')[-1]
-        image_bytes = base64.b64decode(image_data)
+        image_bytes = decode_image_data(image_data)
         
         if not FACE_RECOGNITION_AVAILABLE:
             logger.warning("Face recognition not available for batch processing")
             return results
 
-        # Load image
-        image = face_recognition.load_image_file(io.BytesIO(image_bytes))
-        
-        # Find all faces
-        face_locations = face_recognition.face_locations(image)
-        if not face_locations:
+        # Find and encode all faces, in a pooled worker process when enabled
+        # Group photos keep more detection pixels since faces are smaller
+        unknown_encodings = run_encoder_job(
+            detect_and_encode_all_faces,
+            image_bytes,
+            getattr(settings, 'FACE_BATCH_DETECTION_MAX_SIDE', 1280),
+            getattr(settings, 'FACE_ENCODE_MAX_SIDE', 1920),
+        )
+        if len(unknown_encodings) == 0:
             return results
-            
-        # Encode all found faces
-        unknown_encodings = face_recognition.face_encodings(image, face_locations)
         
         # Prepare known faces for comparison
-        known_ids = list(known_faces_dict.keys())
-        known_encodings = []
-        for uid in known_ids:
-            # Convert bytes to numpy array
-            encoding_bytes = known_faces_dict[uid]
-            known_encodings.append(np.frombuffer(encoding_bytes, dtype=np.float64))
+        if isinstance(known_faces_dict, EventGallery):
+            # Cached gallery: ids and matrix are already decoded
+            known_ids = known_faces_dict.ids.tolist()
+            known_encodings = known_faces_dict.matrix
+        else:
+            known_ids = list(known_faces_dict.keys())
+            known_encodings = []
+            for uid in known_ids:
+                # Convert bytes to numpy array
+                encoding_bytes = known_faces_dict[uid]
+                known_encodings.append(bytes_to_face_encoding(encoding_bytes))
             
-        if not known_encodings:
+        if len(known_encodings) == 0:
             return results
 
-        # Compare each found face against all known faces
-        for unknown_encoding in unknown_encodings:
-            # face_distance returns array of distances to known_encodings
-            distances = face_recognition.face_distance(known_encodings, unknown_encoding)
-            
-            # Find the best match (smallest distance)
-            best_match_index = np.argmin(distances)
-            min_distance = distances[best_match_index]
-            
-            if min_distance <= tolerance:
-                matched_id = known_ids[best_match_index]
-                confidence = max(0.0, 1.0 - min(min_distance / tolerance, 1.0))
-                
-                # Check if this user is already in results (avoid duplicates if multiple faces match same person - rare but possible)
-                if not any(r['user_id'] == matched_id for r in results):
-                    results.append({
-                        'user_id': matched_id,
-                        'confidence': confidence
-                    })
+        # Distances of every found face to every known face in one shot
+        distances = face_distance_matrix(unknown_encodings, known_encodings)
+
+        # One face per student, closest pairs first
+        for face_index, known_index, distance in assign_faces(distances, known_ids, tolerance):
+            results.append({
+                'user_id': known_ids[known_index],
+                'confidence': max(0.0, 1.0 - min(distance / tolerance, 1.0))
+            })
                     
+    except FaceEncoderUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error in batch face recognition: {str(e)}")
         
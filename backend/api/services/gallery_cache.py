@@ -0,0 +1,106 @@
+"""
+Event Gallery Cache
+Keeps a process-local, ready-to-match matrix of enrolled face embeddings per event.
+"""
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+from django.conf import settings
+
+from .embedding_store import EMBEDDING_DIM, load_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+class EventGallery:
+    """
+    Face embeddings of every enrolled student of one event.
+
+    Attributes:
+        event_id: Event the gallery belongs to
+        ids: int64 array of user ids, row-aligned with ``matrix``
+        matrix: C-contiguous float64 array of shape (N, 128)
+        built_at: time.monotonic() timestamp of when the gallery was loaded
+    """
+
+    __slots__ = ('event_id', 'ids', 'matrix', 'built_at')
+
+    def __init__(self, event_id: int, ids: np.ndarray, matrix: np.ndarray):
+        self.event_id = event_id
+        self.ids = ids
+        self.matrix = matrix
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, user_id) -> bool:
+        return bool(np.any(self.ids == user_id))
+
+
+_cache: Dict[int, EventGallery] = {}
+_lock = threading.Lock()
+
+
+def _cache_ttl() -> float:
+    # Invalidation is process-local, so other workers only notice changes once the entry expires
+    return float(getattr(settings, 'FACE_GALLERY_CACHE_TTL', 300))
+
+
+def build_event_gallery(event_id: int) -> EventGallery:
+    """
+    Load the gallery for an event straight from the embedding store.
+
+    Embeddings that cannot be decoded to a 128-d vector are skipped with a warning.
+    """
+    ids, vectors = load_embeddings({'enrollments__event_id': event_id})
+
+    if vectors:
+        matrix = np.ascontiguousarray(np.vstack(vectors))
+    else:
+        matrix = np.empty((0, EMBEDDING_DIM), dtype=np.float64)
+
+    return EventGallery(event_id, np.asarray(ids, dtype=np.int64), matrix)
+
+
+def get_event_gallery(event_id: int) -> EventGallery:
+    """
+    Return the cached gallery for an event, loading it on a miss or after the TTL.
+    """
+    event_id = int(event_id)
+    with _lock:
+        gallery = _cache.get(event_id)
+    if gallery is not None and time.monotonic() - gallery.built_at < _cache_ttl():
+        return gallery
+
+    gallery = build_event_gallery(event_id)
+    with _lock:
+        _cache[event_id] = gallery
+    return gallery
+
+
+def invalidate_event_gallery(event_id: Optional[int] = None) -> None:
+    """
+    Drop the cached gallery of one event, or of every event when event_id is None.
+    """
+    with _lock:
+        if event_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(int(event_id), None)
+
+
+def invalidate_user_galleries(user_id: int) -> None:
+    """
+    Drop the cached galleries of every event the user is enrolled in.
+    Call this whenever the user's face embedding changes.
+    """
+    from api.models import Enrollment
+
+    event_ids = list(Enrollment.objects.filter(student_id=user_id).values_list('event_id', flat=True))
+    with _lock:
+        for event_id in event_ids:
+            _cache.pop(event_id, None)
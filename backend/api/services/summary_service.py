@@ -0,0 +1,147 @@
+"""
+Attendance Summary Service
+Maintains AttendanceSummary, the per (event, date) present/late/absent counts
+that stats and reports read instead of aggregating raw AttendanceRecord rows.
+
+Rows are refreshed incrementally: every write to an attendance record or an
+enrollment recomputes just the affected (event, date) rows, one aggregate and
+one upsert each. Saves and deletes through the ORM (views, the admin) are
+picked up by the signals in api.signals; bulk writes that skip signals call
+refresh_attendance_summary themselves. rebuild_attendance_summaries and
+verify_attendance_summaries back the rebuild_attendance_summaries command.
+"""
+import logging
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+
+logger = logging.getLogger(__name__)
+
+ATTENDED_STATUSES = ('present', 'late')
+SUMMARY_FIELDS = ('enrolled_count', 'present_count', 'late_count', 'absent_count', 'mean_confidence')
+
+
+def compute_summary(event_id: int, date, enrolled_count: Optional[int] = None) -> dict:
+    """
+    Summary values for one (event, date), computed from the raw records.
+    """
+    from api.models import AttendanceRecord, Enrollment
+
+    if enrolled_count is None:
+        enrolled_count = Enrollment.objects.filter(event_id=event_id).count()
+    counts = AttendanceRecord.objects.filter(event_id=event_id, date=date).aggregate(
+        present_count=Count('id', filter=Q(status='present')),
+        late_count=Count('id', filter=Q(status='late')),
+        mean_confidence=Avg('confidence_score', filter=Q(status__in=ATTENDED_STATUSES)),
+    )
+    attended = counts['present_count'] + counts['late_count']
+    return {
+        'enrolled_count': enrolled_count,
+        'present_count': counts['present_count'],
+        'late_count': counts['late_count'],
+        'absent_count': max(enrolled_count - attended, 0),
+        'mean_confidence': counts['mean_confidence'],
+    }
+
+
+def refresh_attendance_summary(event_id: int, date, create: bool = True) -> None:
+    """
+    Recompute the summary row for one (event, date).
+
+    Args:
+        event_id: Event id
+        date: Attendance date
+        create: Insert the row if it does not exist yet. Delete paths pass False,
+            so a cascading event delete never re-creates rows for the event.
+    """
+    from api.models import AttendanceSummary
+
+    values = compute_summary(event_id, date)
+    if create:
+        AttendanceSummary.objects.bulk_create(
+            [AttendanceSummary(event_id=event_id, date=date, **values)],
+            update_conflicts=True,
+            unique_fields=['event', 'date'],
+            update_fields=list(SUMMARY_FIELDS) + ['updated_at'],
+        )
+    else:
+        AttendanceSummary.objects.filter(event_id=event_id, date=date).update(**values)
+
+
+def refresh_event_summaries(event_id: int, create: bool = True) -> None:
+    """
+    Recompute every summary row of an event after its enrollments changed.
+    The row for the event's scheduled date always exists once someone enrolled,
+    so events nobody attended still count in the averages.
+    """
+    from api.models import AttendanceSummary, Event
+
+    dates = set(AttendanceSummary.objects.filter(event_id=event_id).values_list('date', flat=True))
+    if create:
+        event_date = Event.objects.filter(id=event_id).values_list('date', flat=True).first()
+        if event_date is not None:
+            dates.add(event_date)
+    for date in dates:
+        refresh_attendance_summary(event_id, date, create=create)
+
+
+def expected_summary_keys() -> set:
+    """(event_id, date) pairs that should have a summary row."""
+    from api.models import AttendanceRecord, Event
+
+    keys = set(AttendanceRecord.objects.values_list('event_id', 'date').distinct())
+    keys.update(Event.objects.filter(enrollments__isnull=False).values_list('id', 'date').distinct())
+    return keys
+
+
+def rebuild_attendance_summaries(event_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute summaries from scratch, for all events or just event_ids.
+
+    Returns:
+        Number of summary rows written
+    """
+    from api.models import AttendanceSummary
+
+    keys = expected_summary_keys()
+    rows = AttendanceSummary.objects.all()
+    if event_ids is not None:
+        event_ids = set(event_ids)
+        keys = {key for key in keys if key[0] in event_ids}
+        rows = rows.filter(event_id__in=event_ids)
+
+    with transaction.atomic():
+        rows.delete()
+        for event_id, date in sorted(keys):
+            refresh_attendance_summary(event_id, date)
+    logger.info(f"Rebuilt {len(keys)} attendance summary rows")
+    return len(keys)
+
+
+def verify_attendance_summaries() -> List[str]:
+    """
+    Compare every summary row with the raw records.
+
+    Returns:
+        A description of each mismatch; empty when the table is consistent
+    """
+    from api.models import AttendanceSummary
+
+    problems = []
+    stored = {(row.event_id, row.date): row for row in AttendanceSummary.objects.all()}
+    for event_id, date in sorted(expected_summary_keys() - set(stored)):
+        problems.append(f"event {event_id} {date}: missing summary row")
+
+    for (event_id, date), row in sorted(stored.items()):
+        expected = compute_summary(event_id, date)
+        for field in SUMMARY_FIELDS:
+            actual = getattr(row, field)
+            wanted = expected[field]
+            if field == 'mean_confidence' and actual is not None and wanted is not None:
+                if abs(actual - wanted) <= 1e-9:
+                    continue
+            elif actual == wanted:
+                continue
+            problems.append(f"event {event_id} {date}: {field} is {actual}, expected {wanted}")
+    return problems
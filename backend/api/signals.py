@@ -0,0 +1,54 @@
+"""
+Keeps AttendanceSummary in step with ORM writes to attendance records and
+enrollments (views, the admin, shell edits). Bulk writes that bypass signals
+refresh the summary themselves, see services.summary_service.
+
+Also drops the cached host role of users who gain or lose an event (api.roles).
+"""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import AttendanceRecord, Enrollment, Event
+from .roles import invalidate_host_role
+from .services.summary_service import refresh_attendance_summary, refresh_event_summaries
+
+
+@receiver(pre_save, sender=AttendanceRecord)
+def remember_previous_summary_key(sender, instance, **kwargs):
+    # An edit may move a record to another event or date; the old row needs refreshing too
+    instance._previous_summary_key = None
+    if instance.pk:
+        instance._previous_summary_key = (
+            AttendanceRecord.objects.filter(pk=instance.pk).values_list('event_id', 'date').first()
+        )
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def attendance_record_saved(sender, instance, **kwargs):
+    key = (instance.event_id, instance.date)
+    refresh_attendance_summary(*key)
+    previous = getattr(instance, '_previous_summary_key', None)
+    if previous and previous != key:
+        refresh_attendance_summary(*previous, create=False)
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def attendance_record_deleted(sender, instance, **kwargs):
+    refresh_attendance_summary(instance.event_id, instance.date, create=False)
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, **kwargs):
+    refresh_event_summaries(instance.event_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    refresh_event_summaries(instance.event_id, create=False)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_ownership_changed(sender, instance, created=True, **kwargs):
+    if created:
+        invalidate_host_role(instance.host_id)
@@ -0,0 +1,120 @@
+"""
+Tests for the write-behind attendance spool used by mark_live.
+"""
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from unittest.mock import patch
+import datetime
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from api.models import Event, Enrollment, AttendanceRecord, AttendanceSummary
+from api.services.attendance_spool import AttendanceSpool, flush_spool, get_attendance_spool, reset_attendance_spool
+from api.services.embedding_store import save_user_embedding
+
+User = get_user_model()
+
+
+class SpoolTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'spool.sqlite3')
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.student = User.objects.create_user(username='student', password='password123')
+        self.event = Event.objects.create(
+            name='Event',
+            date=datetime.date.today(),
+            time=(datetime.datetime.now() - datetime.timedelta(minutes=5)).time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1)
+        )
+        Enrollment.objects.create(event=self.event, student=self.student)
+
+    def tearDown(self):
+        reset_attendance_spool()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+class AttendanceSpoolTests(SpoolTestCase):
+    def test_append_is_durable_and_deduplicated(self):
+        spool = AttendanceSpool(self.path)
+        at = datetime.time(9, 15)
+
+        self.assertIsNone(spool.append(self.event.id, self.student.id, datetime.date.today(), at, 'present', 0.9))
+        self.assertEqual(
+            spool.append(self.event.id, self.student.id, datetime.date.today(), datetime.time(9, 30), 'present', 0.8),
+            at
+        )
+        # A new process sees the same journal
+        self.assertEqual(len(AttendanceSpool(self.path)), 1)
+
+    def test_flush_writes_records_with_recognition_time(self):
+        spool = AttendanceSpool(self.path)
+        spool.append(self.event.id, self.student.id, datetime.date.today(), datetime.time(9, 15), 'late', 0.7)
+
+        self.assertEqual(flush_spool(spool), 1)
+
+        record = AttendanceRecord.objects.get(event=self.event, student=self.student)
+        self.assertEqual((record.time, record.status, record.confidence_score), (datetime.time(9, 15), 'late', 0.7))
+        self.assertEqual(len(spool), 0)
+        self.assertEqual(AttendanceSummary.objects.get(event=self.event, date=datetime.date.today()).late_count, 1)
+
+    def test_flush_is_idempotent_after_a_crash(self):
+        spool = AttendanceSpool(self.path)
+        spool.append(self.event.id, self.student.id, datetime.date.today(), datetime.time(9, 15), 'present', 0.9)
+
+        # Committed, but the process died before the entries were removed from the journal
+        with patch.object(AttendanceSpool, 'remove'):
+            flush_spool(spool)
+        self.assertEqual(len(spool), 1)
+
+        flush_spool(spool)
+
+        self.assertEqual(AttendanceRecord.objects.filter(event=self.event).count(), 1)
+        self.assertEqual(len(spool), 0)
+
+
+class SpooledMarkLiveTests(SpoolTestCase):
+    def setUp(self):
+        super().setUp()
+        self.encoding = np.random.rand(128)
+        save_user_embedding(self.student, self.encoding)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student)
+        self.settings_override = override_settings(
+            ATTENDANCE_WRITE_MODE='spool', ATTENDANCE_SPOOL_PATH=self.path, ATTENDANCE_SPOOL_FLUSH_INTERVAL=0
+        )
+        self.settings_override.enable()
+        reset_attendance_spool()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        super().tearDown()
+
+    def mark(self):
+        return self.client.post(reverse('attendance-mark-live'), {
+            'event_id': self.event.id, 'image': 'data:image/jpeg;base64,aGVsbG8='
+        }, format='json')
+
+    @patch('api.views.encode_face_from_base64')
+    def test_mark_live_acknowledges_then_flushes(self, mock_encode):
+        mock_encode.return_value = self.encoding
+
+        response = self.mark()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'marked')
+        self.assertTrue(response.data['queued'])
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+        # Marking again while still spooled is reported as already marked
+        self.assertEqual(self.mark().data['status'], 'already_marked')
+
+        flush_spool(get_attendance_spool())
+        record = AttendanceRecord.objects.get(event=self.event, student=self.student)
+        self.assertEqual(record.status, 'present')
+        self.assertEqual(self.mark().data['status'], 'already_marked')
@@ -0,0 +1,111 @@
+"""
+Tests for the maintained per (event, date) attendance summary.
+"""
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+from rest_framework import status
+from io import StringIO
+import datetime
+
+from api.models import Event, Enrollment, AttendanceRecord, AttendanceSummary
+from api.services.attendance_service import mark_batch_matches
+from api.services.summary_service import verify_attendance_summaries
+
+User = get_user_model()
+
+
+class AttendanceSummaryTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.students = [
+            User.objects.create_user(username=f'student{i}', password='password123')
+            for i in range(4)
+        ]
+        self.event = Event.objects.create(
+            name='Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1)
+        )
+        for student in self.students:
+            Enrollment.objects.create(event=self.event, student=student)
+        self.today = datetime.date.today()
+
+    def summary(self):
+        return AttendanceSummary.objects.get(event=self.event, date=self.today)
+
+    def test_enrollment_creates_row_for_event_date(self):
+        summary = self.summary()
+
+        self.assertEqual(summary.enrolled_count, 4)
+        self.assertEqual(summary.absent_count, 4)
+        self.assertIsNone(summary.mean_confidence)
+
+    def test_record_writes_update_counts(self):
+        record = AttendanceRecord.objects.create(
+            event=self.event, student=self.students[0], status='present', confidence_score=0.8
+        )
+        AttendanceRecord.objects.create(event=self.event, student=self.students[1], status='late', confidence_score=0.6)
+
+        summary = self.summary()
+        self.assertEqual((summary.present_count, summary.late_count, summary.absent_count), (1, 1, 2))
+        self.assertAlmostEqual(summary.mean_confidence, 0.7)
+
+        # Edits (e.g. from the admin) and deletes are picked up too
+        record.status = 'absent'
+        record.save()
+        self.assertEqual((self.summary().present_count, self.summary().absent_count), (0, 3))
+
+        record.delete()
+        Enrollment.objects.filter(student=self.students[3]).delete()
+        summary = self.summary()
+        self.assertEqual((summary.enrolled_count, summary.late_count, summary.absent_count), (3, 1, 2))
+        self.assertEqual(verify_attendance_summaries(), [])
+
+    def test_batch_matches_refresh_summary(self):
+        mark_batch_matches(self.event, [{'user_id': s.id, 'confidence': 0.9} for s in self.students[:3]])
+
+        summary = self.summary()
+        self.assertEqual((summary.present_count, summary.absent_count), (3, 1))
+        self.assertEqual(verify_attendance_summaries(), [])
+
+    def test_deleting_event_removes_summaries(self):
+        AttendanceRecord.objects.create(event=self.event, student=self.students[0], status='present', confidence_score=0.8)
+
+        self.event.delete()
+
+        self.assertFalse(AttendanceSummary.objects.exists())
+
+    def test_rebuild_command_repairs_and_verifies(self):
+        AttendanceRecord.objects.create(event=self.event, student=self.students[0], status='present', confidence_score=0.8)
+        # Writes that bypass signals leave the table stale
+        AttendanceRecord.objects.filter(event=self.event).update(status='late')
+        AttendanceSummary.objects.filter(event=self.event).update(enrolled_count=99)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_attendance_summaries', '--verify', stdout=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_attendance_summaries', stdout=out)
+
+        self.assertIn('match the raw records', out.getvalue())
+        summary = self.summary()
+        self.assertEqual((summary.enrolled_count, summary.present_count, summary.late_count), (4, 0, 1))
+
+    def test_summary_endpoint_is_scoped_to_host(self):
+        client = APIClient()
+        url = reverse('events-summary', args=[self.event.id])
+
+        other_host = User.objects.create_user(username='other', password='password123', role='host')
+        client.force_authenticate(user=other_host)
+        self.assertEqual(client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        client.force_authenticate(user=self.host)
+        response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['enrolled_count'], 4)
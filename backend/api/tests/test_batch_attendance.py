@@ -4,7 +4,11 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from api.models import Event, Enrollment, AttendanceRecord
+from api.services.attendance_service import mark_batch_matches
+from api.services.face_service import face_encoding_to_bytes
+from api.services.gallery_cache import invalidate_event_gallery
 import datetime
+import numpy as np
 from unittest.mock import patch, MagicMock
 
 User = get_user_model()
@@ -15,9 +19,10 @@ class BatchAttendanceTests(TestCase):
         self.host = User.objects.create_user(username='host', password='password123', role='host')
         self.student = User.objects.create_user(username='student', password='password123', role='student')
         
-        # Simulate face embedding for student (dummy bytes)
-        self.student.face_embedding = b'dummy_embedding'
+        # Simulate face embedding for student (random 128-d encoding)
+        self.student.face_embedding = face_encoding_to_bytes(np.random.rand(128))
         self.student.save()
+        invalidate_event_gallery()
         
         self.event = Event.objects.create(
             name='Test Event',
@@ -89,3 +94,50 @@ class BatchAttendanceTests(TestCase):
             event=self.event, 
             student=self.student
         ).exists())
+
+
+class BulkMarkingTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.event = Event.objects.create(
+            name='Crowded Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1)
+        )
+        self.students = [
+            User.objects.create_user(username=f'student{i}', password='password123')
+            for i in range(20)
+        ]
+
+    def matches(self, students):
+        return [{'user_id': s.id, 'confidence': 0.9} for s in students]
+
+    def test_query_count_does_not_grow_with_matches(self):
+        with self.assertNumQueries(8):
+            mark_batch_matches(self.event, self.matches(self.students[:2]))
+        with self.assertNumQueries(8):
+            mark_batch_matches(self.event, self.matches(self.students[2:]))
+
+        self.assertEqual(AttendanceRecord.objects.filter(event=self.event).count(), 20)
+
+    def test_reports_marked_and_already_marked(self):
+        mark_batch_matches(self.event, self.matches(self.students[:5]))
+
+        results = mark_batch_matches(self.event, self.matches(self.students[:10]))
+
+        statuses = {r['student']: r['status'] for r in results}
+        self.assertEqual(len(results), 10)
+        self.assertEqual(statuses['student0'], 'already_marked')
+        self.assertEqual(statuses['student9'], 'marked')
+        self.assertEqual(AttendanceRecord.objects.filter(event=self.event).count(), 10)
+        record = AttendanceRecord.objects.get(event=self.event, student=self.students[9])
+        self.assertEqual(record.status, 'present')
+        self.assertEqual(record.date, datetime.date.today())
+
+    def test_duplicate_match_in_one_frame_marks_once(self):
+        results = mark_batch_matches(self.event, self.matches([self.students[0], self.students[0]]))
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(AttendanceRecord.objects.filter(event=self.event).count(), 1)
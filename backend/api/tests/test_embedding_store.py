@@ -0,0 +1,98 @@
+"""
+Tests for the compact face embedding store.
+"""
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+import numpy as np
+
+from api.models import Event, Enrollment, FaceEmbedding
+from api.services.embedding_store import (
+    HEADER,
+    decode_embedding,
+    decode_header,
+    encode_embedding,
+    load_embeddings,
+    load_user_embedding,
+    save_user_embedding,
+)
+import datetime
+
+User = get_user_model()
+
+
+class EmbeddingCodecTests(SimpleTestCase):
+    def setUp(self):
+        # Same value range as dlib encodings
+        self.encoding = np.random.default_rng(0).uniform(-0.3, 0.3, 128)
+
+    def test_float32_round_trip(self):
+        blob = encode_embedding(self.encoding, dtype='float32')
+
+        self.assertEqual(len(blob), HEADER.size + 128 * 4)
+        np.testing.assert_allclose(decode_embedding(blob), self.encoding, rtol=1e-6)
+
+    def test_float16_keeps_distances_within_tolerance(self):
+        other = self.encoding + 0.02
+        blob_a = encode_embedding(self.encoding, dtype='float16')
+        blob_b = encode_embedding(other, dtype='float16')
+
+        self.assertEqual(len(blob_a), HEADER.size + 128 * 2)
+        exact = np.linalg.norm(self.encoding - other)
+        approx = np.linalg.norm(decode_embedding(blob_a) - decode_embedding(blob_b))
+        self.assertAlmostEqual(exact, approx, places=3)
+
+    def test_header_fields(self):
+        header = decode_header(encode_embedding(self.encoding, model_id=1, dtype='float32'))
+
+        self.assertEqual(header['version'], 1)
+        self.assertEqual(header['dtype'], np.float32)
+        self.assertEqual(header['dimension'], 128)
+        self.assertEqual(header['model_id'], 1)
+        self.assertAlmostEqual(header['norm'], np.linalg.norm(self.encoding), places=5)
+
+    def test_legacy_float64_blob_is_decoded(self):
+        np.testing.assert_array_equal(decode_embedding(self.encoding.tobytes()), self.encoding)
+
+    def test_invalid_blobs_are_rejected(self):
+        blob = encode_embedding(self.encoding)
+        for bad in (b'', b'dummy_embedding', blob[:-3]):
+            with self.assertRaises(ValueError):
+                decode_embedding(bad)
+
+
+class EmbeddingTableTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.student = User.objects.create_user(username='student', password='password123')
+        self.encoding = np.random.rand(128)
+
+    def test_save_moves_embedding_off_user_row(self):
+        self.student.face_embedding = self.encoding.tobytes()
+        self.student.save()
+
+        save_user_embedding(self.student, self.encoding)
+
+        self.student.refresh_from_db()
+        self.assertIsNone(self.student.face_embedding)
+        self.assertTrue(FaceEmbedding.objects.filter(user=self.student).exists())
+        np.testing.assert_allclose(load_user_embedding(self.student), self.encoding, rtol=1e-6)
+
+    def test_load_embeddings_for_event(self):
+        event = Event.objects.create(
+            name='Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1)
+        )
+        legacy = User.objects.create_user(username='legacy', password='password123')
+        legacy.face_embedding = self.encoding.tobytes()
+        legacy.save()
+        save_user_embedding(self.student, self.encoding)
+        Enrollment.objects.create(event=event, student=self.student)
+        Enrollment.objects.create(event=event, student=legacy)
+
+        ids, vectors = load_embeddings({'enrollments__event_id': event.id})
+
+        self.assertCountEqual(ids, [self.student.id, legacy.id])
+        self.assertEqual(len(vectors), 2)
@@ -0,0 +1,87 @@
+"""
+Tests for the bounded face encoder process pool.
+"""
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from unittest.mock import patch
+import datetime
+import math
+import time
+import numpy as np
+
+from api.models import Event, Enrollment
+from api.services.encoder_pool import EncoderBusy, EncoderTimeout, FaceEncoderPool
+from api.services.embedding_store import save_user_embedding
+from api.services.gallery_cache import invalidate_event_gallery
+
+User = get_user_model()
+
+
+class FaceEncoderPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = FaceEncoderPool(workers=1, max_pending=1, timeout=5, queue_wait=0.05, initializer=None)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_runs_job_in_worker(self):
+        self.assertEqual(self.pool.run(math.sqrt, 16.0), 4.0)
+
+    def test_job_timeout(self):
+        with self.assertRaises(EncoderTimeout):
+            self.pool.run(time.sleep, 2, timeout=0.2)
+
+    def test_backpressure_when_queue_is_full(self):
+        # The timed-out job still holds the only slot until it finishes
+        with self.assertRaises(EncoderTimeout):
+            self.pool.run(time.sleep, 2, timeout=0.2)
+        with self.assertRaises(EncoderBusy):
+            self.pool.run(math.sqrt, 4.0)
+
+
+class EncoderBusyResponseTests(TestCase):
+    def setUp(self):
+        invalidate_event_gallery()
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.student = User.objects.create_user(username='student', password='password123')
+        save_user_embedding(self.student, np.random.rand(128))
+        self.event = Event.objects.create(
+            name='Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1)
+        )
+        Enrollment.objects.create(event=self.event, student=self.student)
+
+    @patch('api.views.encode_face_from_base64', side_effect=EncoderBusy("busy"))
+    def test_mark_live_returns_503(self, mock_encode):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post(reverse('attendance-mark-live'), {
+            'event_id': self.event.id,
+            'image': 'data'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    @patch('api.views.recognize_faces_in_image', side_effect=EncoderBusy("busy"))
+    def test_batch_recognize_returns_503(self, mock_recognize):
+        self.client.force_authenticate(user=self.host)
+        response = self.client.post(reverse('attendance-batch-recognize'), {
+            'event_id': self.event.id,
+            'image': 'data'
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @patch('api.views.encode_face_from_base64', side_effect=EncoderTimeout("slow"))
+    def test_enroll_face_returns_503(self, mock_encode):
+        self.client.force_authenticate(user=self.student)
+        response = self.client.post(reverse('users-enroll-face'), {'image': 'data'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -0,0 +1,58 @@
+"""
+Tests for single and multi-frame face enrollment.
+"""
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from unittest.mock import patch
+import numpy as np
+
+from api.models import FaceEmbedding
+from api.services.embedding_store import load_user_templates
+
+User = get_user_model()
+
+
+class MultiFrameEnrollmentTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.student = User.objects.create_user(username='student', password='password123')
+        self.client.force_authenticate(user=self.student)
+        self.url = reverse('users-enroll-face')
+
+        rng = np.random.default_rng(3)
+        self.person = rng.uniform(-0.2, 0.2, 128)
+        self.samples = list(self.person + rng.normal(scale=0.01, size=(4, 128)))
+
+    @patch('api.views.encode_faces_from_base64')
+    def test_multi_frame_enrollment_stores_templates(self, mock_encode):
+        outlier = np.random.default_rng(4).uniform(-0.2, 0.2, 128)
+        mock_encode.return_value = self.samples + [outlier, None]
+
+        response = self.client.post(self.url, {'images': ['a', 'b', 'c', 'd', 'e', 'f']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['frames'], 6)
+        self.assertEqual(response.data['faces_detected'], 5)
+        self.assertEqual(response.data['outliers_rejected'], 1)
+        self.assertEqual(FaceEmbedding.objects.filter(user=self.student).count(), response.data['templates'])
+        templates = load_user_templates(self.student)
+        self.assertTrue(np.all(np.linalg.norm(templates - self.person, axis=1) < 0.2))
+
+    @patch('api.views.encode_face_from_base64')
+    def test_single_image_enrollment_replaces_templates(self, mock_encode):
+        FaceEmbedding.objects.create(user=self.student, data=b'old')
+        mock_encode.return_value = self.samples[0]
+
+        response = self.client.post(self.url, {'image': 'a'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['templates'], 1)
+        self.assertEqual(FaceEmbedding.objects.filter(user=self.student).count(), 1)
+
+    def test_too_many_frames_rejected(self):
+        response = self.client.post(self.url, {'images': ['a'] * 11}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
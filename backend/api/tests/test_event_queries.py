@@ -0,0 +1,115 @@
+"""
+Query-count regression tests for EventViewSet actions.
+"""
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+import datetime
+
+from api.models import Event, Enrollment
+from api.roles import is_host
+
+User = get_user_model()
+
+
+class EventViewSetQueryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user(username='host', password='password', role='host')
+        self.student = User.objects.create_user(username='student', password='password')
+        self.events = [
+            Event.objects.create(
+                host=self.host,
+                name=f"Event {i}",
+                date=datetime.date.today() - datetime.timedelta(days=i),
+                time=datetime.time(10, 0),
+                duration=datetime.timedelta(hours=1)
+            )
+            for i in range(5)
+        ]
+        for event in self.events:
+            Enrollment.objects.create(student=self.student, event=event)
+        self.event = self.events[0]
+
+    def as_user(self, user):
+        # A fresh instance per request, like JWT authentication gives
+        self.client.force_authenticate(user=User.objects.get(pk=user.pk))
+
+    def test_host_list(self):
+        self.as_user(self.host)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('events-list'))
+        self.assertEqual(len(response.data), 5)
+
+    def test_student_list(self):
+        self.as_user(self.student)
+        # First request resolves (and caches) that the student owns no events
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('events-list'))
+        self.assertEqual([e['id'] for e in response.data], [e.id for e in self.events])
+
+        self.as_user(self.student)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('events-list'))
+
+    def test_retrieve(self):
+        self.as_user(self.host)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('events-detail', args=[self.event.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_create(self):
+        self.as_user(self.host)
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('events-list'), {
+                'name': 'New', 'date': str(datetime.date.today()), 'time': '09:00', 'duration': '01:00:00'
+            })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_update(self):
+        self.as_user(self.host)
+        with self.assertNumQueries(2):
+            response = self.client.patch(reverse('events-detail', args=[self.event.id]), {'name': 'Renamed'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_start_and_end_session(self):
+        self.as_user(self.host)
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('events-start-session', args=[self.event.id]))
+        self.assertEqual(response.data['is_live'], True)
+
+        self.as_user(self.host)
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('events-end-session', args=[self.event.id]))
+        self.assertEqual(response.data['is_live'], False)
+
+    def test_join_event(self):
+        newcomer = User.objects.create_user(username='newcomer', password='password')
+        self.as_user(newcomer)
+        # lookup, enrolled check and insert, then the attendance summary refresh
+        with self.assertNumQueries(3 + 5):
+            response = self.client.post(reverse('events-join-event'), {'join_code': self.event.join_code})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_stats(self):
+        self.as_user(self.host)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('events-stats'))
+
+    def test_summary(self):
+        self.as_user(self.host)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('events-summary', args=[self.event.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_creating_event_clears_cached_role(self):
+        self.assertFalse(is_host(User.objects.get(pk=self.student.pk)))
+
+        Event.objects.create(
+            host=self.student, name="Own", date=datetime.date.today(),
+            time=datetime.time(10, 0), duration=datetime.timedelta(hours=1)
+        )
+
+        self.assertTrue(is_host(User.objects.get(pk=self.student.pk)))
@@ -0,0 +1,96 @@
+"""
+Tests for the streaming attendance export.
+"""
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+from unittest import skipUnless
+import csv
+import datetime
+import io
+import json
+
+from api.exports import PYARROW_AVAILABLE
+from api.models import Event, Enrollment, AttendanceRecord
+
+User = get_user_model()
+
+
+@override_settings(EXPORT_CHUNK_SIZE=3)
+class AttendanceExportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user(username='host', password='password', role='host')
+        self.students = [
+            User.objects.create_user(username=f'student{i}', password='password')
+            for i in range(7)
+        ]
+        self.event = Event.objects.create(
+            host=self.host,
+            name='Lecture',
+            date=datetime.date.today(),
+            time=datetime.time(10, 0),
+            duration=datetime.timedelta(hours=1)
+        )
+        for student in self.students:
+            Enrollment.objects.create(student=student, event=self.event)
+            AttendanceRecord.objects.create(event=self.event, student=student, status='present', confidence_score=0.9)
+        self.client.force_authenticate(user=self.host)
+        self.url = reverse('attendance-export')
+
+    def download(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_export(self):
+        response, body = self.download(event=self.event.id)
+
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[0]['student'], 'student0')
+        self.assertEqual(rows[0]['event'], 'Lecture')
+
+    def test_ndjson_export(self):
+        _, body = self.download(output='ndjson', status='late')
+        self.assertEqual(body, b'')
+
+        _, body = self.download(output='ndjson')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[-1]['date'], str(datetime.date.today()))
+
+    def test_summary_export(self):
+        _, body = self.download(table='summary')
+
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['enrolled'], rows[0]['present'], rows[0]['absent']), ('7', '7', '0'))
+
+    def test_empty_csv_has_header(self):
+        _, body = self.download(date_to='2000-01-01')
+
+        self.assertTrue(body.decode().startswith('id,event_id,event,'))
+
+    @skipUnless(PYARROW_AVAILABLE, "pyarrow not installed")
+    def test_parquet_export(self):
+        import pyarrow.parquet
+
+        _, body = self.download(output='parquet')
+
+        table = pyarrow.parquet.read_table(io.BytesIO(body))
+        self.assertEqual(table.num_rows, 7)
+        self.assertEqual(table.column('student').to_pylist()[0], 'student0')
+
+    def test_rejects_students_and_bad_params(self):
+        self.assertEqual(self.client.get(self.url, {'output': 'xlsx'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'table': 'users'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.students[0])
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
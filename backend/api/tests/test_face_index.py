@@ -0,0 +1,115 @@
+"""
+Tests for the institution-wide identification index and kiosk check-in.
+"""
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from unittest.mock import patch
+import datetime
+import numpy as np
+
+from api.models import Event, Enrollment, AttendanceRecord
+from api.services.face_index import FaceIndex, reset_identification_index
+from api.services.face_service import face_encoding_to_bytes
+
+User = get_user_model()
+
+
+class FaceIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.ids = np.arange(1, 5001)
+        self.vectors = rng.normal(size=(5000, 128))
+        self.queries = self.vectors[:200] + rng.normal(scale=0.01, size=(200, 128))
+
+    def test_ivf_search_finds_nearest_user(self):
+        index = FaceIndex(n_probe=8, exact_below=1000)
+        index.build(self.ids, self.vectors)
+
+        self.assertIsNotNone(index.centroids)
+        hits = sum(index.search(query)[0][0] == user_id for query, user_id in zip(self.queries, self.ids[:200]))
+        self.assertGreaterEqual(hits / 200, 0.95)
+
+    def test_incremental_insert_and_delete(self):
+        index = FaceIndex(n_probe=8, exact_below=1000)
+        index.build(self.ids, self.vectors)
+
+        newcomer = np.full(128, 5.0)
+        index.add(9999, newcomer)
+        self.assertEqual(index.search(newcomer)[0][0], 9999)
+
+        index.remove(9999)
+        self.assertNotIn(9999, index)
+        self.assertNotEqual(index.search(newcomer)[0][0], 9999)
+
+    def test_small_index_is_exact(self):
+        index = FaceIndex(exact_below=1000)
+        index.build(self.ids[:50], self.vectors[:50])
+
+        self.assertIsNone(index.centroids)
+        self.assertEqual(index.search(self.queries[7])[0][0], 8)
+
+
+class KioskIdentifyTests(TestCase):
+    def setUp(self):
+        reset_identification_index()
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.student = User.objects.create_user(username='student', password='password123')
+        self.encoding = np.random.rand(128)
+        self.student.face_embedding = face_encoding_to_bytes(self.encoding)
+        self.student.save()
+
+        self.event = Event.objects.create(
+            name='Kiosk Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1),
+            is_live=True,
+        )
+        Enrollment.objects.create(event=self.event, student=self.student)
+        self.client.force_authenticate(user=self.host)
+        self.url = reverse('attendance-identify')
+
+    def tearDown(self):
+        reset_identification_index()
+
+    @patch('api.views.encode_face_from_base64')
+    def test_identify_marks_enrolled_student(self, mock_encode):
+        mock_encode.return_value = self.encoding + 0.01
+
+        response = self.client.post(self.url, {'image': 'data'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['student'], 'student')
+        self.assertEqual(response.data['results'][0]['status'], 'marked')
+        self.assertTrue(AttendanceRecord.objects.filter(event=self.event, student=self.student).exists())
+
+    @patch('api.views.encode_face_from_base64')
+    def test_unknown_face_is_rejected(self, mock_encode):
+        mock_encode.return_value = self.encoding + 1.0
+
+        response = self.client.post(self.url, {'image': 'data'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+
+class FaceIndexTemplateTests(SimpleTestCase):
+    def test_user_with_several_templates_is_returned_once(self):
+        rng = np.random.default_rng(5)
+        index = FaceIndex(exact_below=1000)
+        index.build(np.arange(1, 101), rng.normal(size=(100, 128)))
+        person = rng.normal(size=128)
+        index.add(500, np.vstack([person, person + 0.05, person + 0.1]))
+
+        results = index.search(person, k=3)
+
+        self.assertEqual(results[0], (500, 0.0))
+        self.assertEqual([user_id for user_id, _ in results].count(500), 1)
+
+        index.remove(500)
+        self.assertEqual(index.vector_count, 100)
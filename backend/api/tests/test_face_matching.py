@@ -0,0 +1,116 @@
+"""
+Tests for the vectorized face matcher in face_service.
+"""
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import patch, MagicMock
+from PIL import Image
+import base64
+import io
+import numpy as np
+
+from api.services import face_service
+from api.services.face_service import (
+    aggregate_templates,
+    assign_faces,
+    compare_faces,
+    face_distance_matrix,
+    face_encoding_to_bytes,
+    recognize_faces_in_image,
+)
+
+
+class FaceDistanceMatrixTests(SimpleTestCase):
+    def test_matches_per_face_euclidean_distance(self):
+        rng = np.random.default_rng(0)
+        unknown = rng.random((5, 128))
+        known = rng.random((7, 128))
+
+        distances = face_distance_matrix(unknown, known)
+
+        self.assertEqual(distances.shape, (5, 7))
+        for i, face in enumerate(unknown):
+            np.testing.assert_allclose(distances[i], np.linalg.norm(known - face, axis=1))
+
+
+class AssignFacesTests(SimpleTestCase):
+    def test_each_student_is_assigned_once(self):
+        # Both faces are closest to student 10, but face 1 is closer to them
+        distances = np.array([
+            [0.40, 0.50],
+            [0.20, 0.90],
+        ])
+        pairs = assign_faces(distances, [10, 20], tolerance=0.6)
+
+        self.assertEqual(pairs, [(0, 1, 0.5), (1, 0, 0.2)])
+
+    def test_pairs_above_tolerance_are_ignored(self):
+        distances = np.array([[0.7, 0.8]])
+        self.assertEqual(assign_faces(distances, [10, 20], tolerance=0.6), [])
+
+    def test_repeated_ids_are_assigned_once(self):
+        distances = np.array([
+            [0.10, 0.30],
+            [0.20, 0.15],
+        ])
+        pairs = assign_faces(distances, [10, 10], tolerance=0.6)
+
+        self.assertEqual(pairs, [(0, 0, 0.1)])
+
+
+@override_settings(FACE_ENCODER_WORKERS=0)
+class RecognizeFacesInImageTests(SimpleTestCase):
+    def setUp(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48)).save(buffer, format='JPEG')
+        self.image_data = base64.b64encode(buffer.getvalue()).decode()
+
+    def test_crowded_frame_matches_every_student(self):
+        rng = np.random.default_rng(1)
+        known = rng.random((60, 128))
+        known_faces = {100 + i: face_encoding_to_bytes(encoding) for i, encoding in enumerate(known)}
+        # Shuffle the faces so matching cannot rely on order
+        order = rng.permutation(60)
+        found = known[order] + rng.normal(scale=0.001, size=(60, 128))
+
+        fake_fr = MagicMock()
+        fake_fr.face_locations.return_value = [(0, 1, 1, 0)] * 60
+        fake_fr.face_encodings.return_value = list(found)
+
+        with patch.object(face_service, 'FACE_RECOGNITION_AVAILABLE', True), \
+             patch.object(face_service, 'face_recognition', fake_fr, create=True):
+            results = recognize_faces_in_image(self.image_data, known_faces)
+
+        self.assertEqual([r['user_id'] for r in results], [100 + i for i in order])
+        self.assertTrue(all(r['confidence'] > 0.9 for r in results))
+
+
+class TemplateAggregationTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.person = rng.uniform(-0.2, 0.2, 128)
+        self.samples = self.person + rng.normal(scale=0.01, size=(6, 128))
+        self.outlier = rng.uniform(-0.2, 0.2, 128)
+
+    def test_outliers_are_rejected(self):
+        templates, inliers = aggregate_templates(
+            np.vstack([self.samples, self.outlier]), mode='mean'
+        )
+
+        self.assertEqual(inliers.tolist(), [True] * 6 + [False])
+        self.assertEqual(templates.shape, (1, 128))
+        np.testing.assert_allclose(templates[0], self.samples.mean(axis=0))
+
+    def test_set_mode_keeps_distinct_samples(self):
+        templates, _ = aggregate_templates(self.samples, mode='set', max_templates=3)
+
+        self.assertEqual(templates.shape, (3, 128))
+        self.assertEqual(len({row.tobytes() for row in templates}), 3)
+
+    def test_compare_faces_uses_closest_template(self):
+        far_template = self.person + 0.5
+        templates = np.vstack([far_template, self.person])
+
+        is_match, confidence = compare_faces(templates, self.samples[0], tolerance=0.6)
+
+        self.assertTrue(is_match)
+        self.assertGreater(confidence, 0.7)
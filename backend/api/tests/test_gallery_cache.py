@@ -0,0 +1,71 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from api.models import Event, Enrollment
+from api.services.face_service import face_encoding_to_bytes
+from api.services.gallery_cache import get_event_gallery, invalidate_event_gallery
+import datetime
+import numpy as np
+from unittest.mock import patch
+
+User = get_user_model()
+
+
+class EventGalleryCacheTests(TestCase):
+    def setUp(self):
+        invalidate_event_gallery()
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.student = User.objects.create_user(username='student', password='password123', role='student')
+        self.encoding = np.random.rand(128)
+        self.student.face_embedding = face_encoding_to_bytes(self.encoding)
+        self.student.save()
+
+        self.event = Event.objects.create(
+            name='Test Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1)
+        )
+        Enrollment.objects.create(event=self.event, student=self.student)
+
+    def test_gallery_is_contiguous_matrix(self):
+        gallery = get_event_gallery(self.event.id)
+
+        self.assertEqual(gallery.matrix.shape, (1, 128))
+        self.assertEqual(gallery.matrix.dtype, np.float64)
+        self.assertTrue(gallery.matrix.flags['C_CONTIGUOUS'])
+        self.assertEqual(gallery.ids.tolist(), [self.student.id])
+        np.testing.assert_allclose(gallery.matrix[0], self.encoding, rtol=1e-6)
+
+    def test_gallery_is_reused_between_calls(self):
+        first = get_event_gallery(self.event.id)
+        with self.assertNumQueries(0):
+            second = get_event_gallery(self.event.id)
+        self.assertIs(first, second)
+
+    def test_join_event_invalidates_gallery(self):
+        get_event_gallery(self.event.id)
+        newcomer = User.objects.create_user(username='newcomer', password='password123')
+        newcomer.face_embedding = face_encoding_to_bytes(np.random.rand(128))
+        newcomer.save()
+
+        self.client.force_authenticate(user=newcomer)
+        self.client.post(reverse('events-join-event'), {'join_code': self.event.join_code})
+
+        self.assertIn(newcomer.id, get_event_gallery(self.event.id))
+
+    @patch('api.views.encode_face_from_base64')
+    def test_enroll_and_reset_face_invalidate_gallery(self, mock_encode):
+        get_event_gallery(self.event.id)
+        new_encoding = np.random.rand(128)
+        mock_encode.return_value = new_encoding
+        self.client.force_authenticate(user=self.student)
+
+        self.client.post(reverse('users-enroll-face'), {'image': 'data'}, format='json')
+        np.testing.assert_allclose(get_event_gallery(self.event.id).matrix[0], new_encoding, rtol=1e-6)
+
+        self.client.post(reverse('users-reset-face'))
+        self.assertEqual(len(get_event_gallery(self.event.id)), 0)
@@ -0,0 +1,73 @@
+"""
+Tests for the downscaled detection pipeline in face_service.
+"""
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import patch, MagicMock
+from PIL import Image
+import io
+import numpy as np
+
+from api.services import face_service
+from api.services.face_service import (
+    encode_face_from_base64,
+    load_image_for_detection,
+    scale_face_locations,
+)
+import base64
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color=(120, 90, 60)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class LoadImageForDetectionTests(SimpleTestCase):
+    def test_detection_image_is_downscaled(self):
+        full, detect = load_image_for_detection(make_jpeg(1920, 1080), detect_max_side=640)
+
+        self.assertEqual(full.shape, (1080, 1920, 3))
+        self.assertEqual(detect.shape, (360, 640, 3))
+
+    def test_small_images_are_left_alone(self):
+        full, detect = load_image_for_detection(make_jpeg(320, 240), detect_max_side=640)
+
+        self.assertIs(full, detect)
+
+    def test_oversized_jpeg_is_decoded_at_reduced_scale(self):
+        full, _ = load_image_for_detection(make_jpeg(4000, 3000), detect_max_side=640, encode_max_side=1920)
+
+        self.assertGreaterEqual(max(full.shape[:2]), 1920)
+        self.assertLess(max(full.shape[:2]), 4000)
+
+
+class ScaleFaceLocationsTests(SimpleTestCase):
+    def test_boxes_are_mapped_to_full_resolution(self):
+        locations = scale_face_locations([(10, 60, 50, 20)], (360, 640, 3), (1080, 1920, 3))
+
+        self.assertEqual(locations, [(30, 180, 150, 60)])
+
+    def test_boxes_are_clipped(self):
+        locations = scale_face_locations([(-2, 641, 361, -1)], (360, 640, 3), (1080, 1920, 3))
+
+        self.assertEqual(locations, [(0, 1920, 1080, 0)])
+
+
+@override_settings(FACE_ENCODER_WORKERS=0, FACE_DETECTION_MAX_SIDE=640)
+class EncodePipelineTests(SimpleTestCase):
+    def test_detects_small_and_encodes_full_resolution(self):
+        fake_fr = MagicMock()
+        fake_fr.face_locations.return_value = [(100, 300, 300, 100)]
+        fake_fr.face_encodings.return_value = [np.ones(128)]
+        image_data = base64.b64encode(make_jpeg(1920, 1080)).decode()
+
+        with patch.object(face_service, 'FACE_RECOGNITION_AVAILABLE', True), \
+             patch.object(face_service, 'face_recognition', fake_fr, create=True):
+            encoding = encode_face_from_base64(image_data)
+
+        np.testing.assert_array_equal(encoding, np.ones(128))
+        detect_image = fake_fr.face_locations.call_args[0][0]
+        self.assertEqual(detect_image.shape, (360, 640, 3))
+        full_image, locations = fake_fr.face_encodings.call_args[0]
+        self.assertEqual(full_image.shape, (1080, 1920, 3))
+        self.assertEqual(locations, [(300, 900, 900, 300)])
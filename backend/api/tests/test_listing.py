@@ -0,0 +1,95 @@
+"""
+Tests for cursor pagination and filters on the event and attendance listings.
+"""
+from django.core.cache import cache
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.test import APITestCase
+import datetime
+
+from api.models import Event, Enrollment, AttendanceRecord
+
+User = get_user_model()
+
+
+class ListingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create_user(username='host', password='password', role='host')
+        self.students = [
+            User.objects.create_user(username=f'student{i}', password='password')
+            for i in range(6)
+        ]
+        today = datetime.date.today()
+        self.events = [
+            Event.objects.create(
+                host=self.host,
+                name=f"Event {i}",
+                date=today - datetime.timedelta(days=i),
+                time=datetime.time(10, 0),
+                duration=datetime.timedelta(hours=1)
+            )
+            for i in range(3)
+        ]
+        for event in self.events:
+            for i, student in enumerate(self.students):
+                Enrollment.objects.create(student=student, event=event)
+                AttendanceRecord.objects.create(
+                    event=event, student=student,
+                    status='late' if i % 2 else 'present', confidence_score=0.9
+                )
+        # auto_now_add stamps every record today; spread them over the events' dates
+        for event in self.events:
+            AttendanceRecord.objects.filter(event=event).update(date=event.date)
+        self.client.force_authenticate(user=self.host)
+        self.url = reverse('attendance-list')
+
+    def test_plain_list_without_page_params(self):
+        response = self.client.get(self.url)
+
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 18)
+
+    def test_cursor_pages_walk_all_records_one_query_each(self):
+        seen = []
+        url = f"{self.url}?page_size=5"
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(all(row['student_username'] and row['event_name'] for row in response.data['results']))
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(len(seen), 18)
+        self.assertEqual(len(set(seen)), 18)
+
+    def test_filters(self):
+        event = self.events[1]
+
+        response = self.client.get(self.url, {'event': event.id, 'status': 'late'})
+        self.assertEqual(len(response.data), 3)
+        self.assertTrue(all(row['event'] == event.id and row['status'] == 'late' for row in response.data))
+
+        response = self.client.get(self.url, {'date_from': str(self.events[1].date), 'status': 'present,late'})
+        self.assertEqual(len(response.data), 12)
+
+        response = self.client.get(self.url, {'date_to': str(self.events[2].date)})
+        self.assertEqual(len(response.data), 6)
+
+    def test_invalid_filters_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'date_from': '2024-13-40'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'status': 'asleep'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'event': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_event_listing_pages_and_filters(self):
+        url = reverse('events-list')
+
+        response = self.client.get(url, {'page_size': 2})
+        self.assertEqual([e['id'] for e in response.data['results']], [self.events[0].id, self.events[1].id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([e['id'] for e in response.data['results']], [self.events[2].id])
+
+        response = self.client.get(url, {'date_to': str(self.events[1].date)})
+        self.assertEqual([e['id'] for e in response.data], [self.events[1].id, self.events[2].id])
@@ -0,0 +1,99 @@
+"""
+Tests for the live attendance WebSocket stream.
+"""
+from django.test import TransactionTestCase
+from django.contrib.auth import get_user_model
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+from unittest.mock import patch
+import datetime
+import json
+import numpy as np
+
+from api.live_stream import LiveStreamRouter, CLOSE_FORBIDDEN, CLOSE_UNAUTHORIZED, CLOSE_SESSION_ENDED
+from api.models import Event, Enrollment, AttendanceRecord
+from api.services.embedding_store import save_user_embedding
+from api.services.gallery_cache import invalidate_event_gallery
+
+User = get_user_model()
+
+
+async def not_found_app(scope, receive, send):
+    raise AssertionError("HTTP app should not be called")
+
+
+class LiveStreamTests(TransactionTestCase):
+    def setUp(self):
+        invalidate_event_gallery()
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.other_host = User.objects.create_user(username='other', password='password123', role='host')
+        self.student = User.objects.create_user(username='student', password='password123')
+        save_user_embedding(self.student, np.random.rand(128))
+        self.event = Event.objects.create(
+            name='Live Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1),
+            is_live=True,
+        )
+        Enrollment.objects.create(event=self.event, student=self.student)
+
+    def communicator(self, user=None, event_id=None):
+        token = str(AccessToken.for_user(user)) if user else ''
+        return ApplicationCommunicator(LiveStreamRouter(not_found_app), {
+            'type': 'websocket',
+            'path': f'/ws/live/{event_id or self.event.id}/',
+            'query_string': f'token={token}'.encode(),
+        })
+
+    @async_to_sync
+    async def connect(self, communicator):
+        await communicator.send_input({'type': 'websocket.connect'})
+        return await communicator.receive_output(timeout=5)
+
+    def test_rejects_missing_token(self):
+        message = self.connect(self.communicator())
+
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+
+    def test_rejects_other_host(self):
+        message = self.connect(self.communicator(self.other_host))
+
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_FORBIDDEN})
+
+    def test_rejects_ended_session(self):
+        Event.objects.filter(id=self.event.id).update(is_live=False)
+
+        message = self.connect(self.communicator(self.host))
+
+        self.assertEqual(message, {'type': 'websocket.close', 'code': CLOSE_SESSION_ENDED})
+
+    @patch('api.live_stream.recognize_faces_in_image')
+    def test_frames_mark_attendance(self, mock_recognize):
+        mock_recognize.return_value = [{'user_id': self.student.id, 'confidence': 0.9}]
+        communicator = self.communicator(self.host)
+
+        @async_to_sync
+        async def run():
+            await communicator.send_input({'type': 'websocket.connect'})
+            accepted = await communicator.receive_output(timeout=5)
+            ready = json.loads((await communicator.receive_output(timeout=5))['text'])
+            await communicator.send_input({'type': 'websocket.receive', 'bytes': b'\xff\xd8frame'})
+            first = json.loads((await communicator.receive_output(timeout=5))['text'])
+            await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'image': 'aGVsbG8='})})
+            second = json.loads((await communicator.receive_output(timeout=5))['text'])
+            await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await communicator.wait(timeout=5)
+            return accepted, ready, first, second
+
+        accepted, ready, first, second = run()
+
+        self.assertEqual(accepted['type'], 'websocket.accept')
+        self.assertEqual(ready['enrolled_faces'], 1)
+        self.assertEqual(first['results'][0]['status'], 'marked')
+        self.assertEqual(second['results'][0]['status'], 'already_marked')
+        self.assertEqual(AttendanceRecord.objects.filter(event=self.event, student=self.student).count(), 1)
+        self.assertEqual(mock_recognize.call_args_list[0][0][0], b'\xff\xd8frame')
+        self.assertEqual(mock_recognize.call_args_list[1][0][0], 'aGVsbG8=')
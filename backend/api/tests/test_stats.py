@@ -76,3 +76,51 @@ class HostStatsTests(APITestCase):
         # Past event has 2 enrollments. 1 attendance record.
         # 1/2 = 50%
         self.assertEqual(data['avg_attendance'], 50.0, f"Expected 50.0 avg attendance, got {data['avg_attendance']}")
+
+    def test_stats_query_count_is_constant(self):
+        today = datetime.date.today()
+        url = reverse('events-stats')
+
+        def add_past_events(count):
+            for i in range(count):
+                event = Event.objects.create(
+                    host=self.host,
+                    name=f"Past Event {i}",
+                    date=today - datetime.timedelta(days=i + 1),
+                    time=datetime.time(10, 0),
+                    duration=datetime.timedelta(hours=1)
+                )
+                Enrollment.objects.create(student=self.student1, event=event)
+                Enrollment.objects.create(student=self.student2, event=event)
+                AttendanceRecord.objects.create(
+                    event=event, student=self.student1, status='present', confidence_score=0.9
+                )
+
+        add_past_events(1)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.data['avg_attendance'], 50.0)
+
+        add_past_events(10)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.data['avg_attendance'], 50.0)
+
+    def test_avg_attendance_ignores_events_without_enrollments(self):
+        today = datetime.date.today()
+        full = Event.objects.create(
+            host=self.host, name="Full", date=today - datetime.timedelta(days=2),
+            time=datetime.time(10, 0), duration=datetime.timedelta(hours=1)
+        )
+        Event.objects.create(
+            host=self.host, name="Empty", date=today - datetime.timedelta(days=1),
+            time=datetime.time(10, 0), duration=datetime.timedelta(hours=1)
+        )
+        Enrollment.objects.create(student=self.student1, event=full)
+        Enrollment.objects.create(student=self.student2, event=full)
+        AttendanceRecord.objects.create(event=full, student=self.student1, status='present', confidence_score=0.9)
+        AttendanceRecord.objects.create(event=full, student=self.student2, status='absent', confidence_score=0.0)
+
+        response = self.client.get(reverse('events-stats'))
+
+        self.assertEqual(response.data['avg_attendance'], 50.0)
@@ -0,0 +1,93 @@
+"""
+Tests for multipart and raw binary frame uploads.
+"""
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from rest_framework import status
+from unittest.mock import patch
+import datetime
+import numpy as np
+
+from api.models import Event, Enrollment, AttendanceRecord
+from api.services.embedding_store import save_user_embedding
+from api.services.face_service import decode_image_data
+from api.services.gallery_cache import invalidate_event_gallery
+
+User = get_user_model()
+
+JPEG_BYTES = b'\xff\xd8\xff\xe0fake-jpeg-body'
+
+
+class BinaryUploadTests(TestCase):
+    def setUp(self):
+        invalidate_event_gallery()
+        self.client = APIClient()
+        self.host = User.objects.create_user(username='host', password='password123', role='host')
+        self.student = User.objects.create_user(username='student', password='password123')
+        self.encoding = np.random.rand(128)
+        save_user_embedding(self.student, self.encoding)
+        self.event = Event.objects.create(
+            name='Event',
+            date=datetime.date.today(),
+            time=datetime.datetime.now().time(),
+            host=self.host,
+            duration=datetime.timedelta(hours=1)
+        )
+        Enrollment.objects.create(event=self.event, student=self.student)
+
+    @patch('api.views.encode_face_from_base64')
+    def test_mark_live_accepts_raw_jpeg_body(self, mock_encode):
+        mock_encode.return_value = self.encoding
+        self.client.force_authenticate(user=self.student)
+
+        response = self.client.post(
+            f"{reverse('attendance-mark-live')}?event_id={self.event.id}",
+            data=JPEG_BYTES,
+            content_type='image/jpeg',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'marked')
+        payload = mock_encode.call_args[0][0]
+        self.assertIsInstance(payload, memoryview)
+        self.assertEqual(bytes(payload), JPEG_BYTES)
+
+    @patch('api.views.recognize_faces_in_image')
+    def test_batch_recognize_accepts_multipart(self, mock_recognize):
+        mock_recognize.return_value = [{'user_id': self.student.id, 'confidence': 0.9}]
+        self.client.force_authenticate(user=self.host)
+
+        response = self.client.post(reverse('attendance-batch-recognize'), {
+            'event_id': self.event.id,
+            'image': SimpleUploadedFile('frame.jpg', JPEG_BYTES, content_type='image/jpeg'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['matches_count'], 1)
+        payload = mock_recognize.call_args[0][0]
+        self.assertIsInstance(payload, memoryview)
+        self.assertEqual(bytes(payload), JPEG_BYTES)
+        self.assertTrue(AttendanceRecord.objects.filter(student=self.student).exists())
+
+    @patch('api.views.encode_faces_from_base64')
+    def test_enroll_face_accepts_multiple_files(self, mock_encode):
+        mock_encode.return_value = [self.encoding, self.encoding + 0.01]
+        self.client.force_authenticate(user=self.student)
+
+        response = self.client.post(reverse('users-enroll-face'), {
+            'images': [
+                SimpleUploadedFile('a.jpg', JPEG_BYTES, content_type='image/jpeg'),
+                SimpleUploadedFile('b.jpg', JPEG_BYTES, content_type='image/jpeg'),
+            ],
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['frames'], 2)
+
+    def test_decode_keeps_base64_compatibility(self):
+        self.assertEqual(decode_image_data('data:image/jpeg;base64,aGVsbG8='), b'hello')
+        view = memoryview(JPEG_BYTES)
+        self.assertIs(decode_image_data(view), view)
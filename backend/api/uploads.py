@@ -0,0 +1,81 @@
+"""
+Image upload handling for the recognition endpoints.
+
+Frames can be sent three ways:
+    - JSON with a base64 (data URL) string in 'image' (original format)
+    - multipart/form-data with the file in 'image' (or several 'images')
+    - a raw image/jpeg (or other image/*) body, with event_id in the query string
+
+Binary uploads are handed to face_service as a memoryview over the received
+bytes, so they are never base64-decoded or copied again.
+"""
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, FormParser, JSONParser, MultiPartParser
+
+
+class RawImageParser(BaseParser):
+    """
+    Parses a raw image body into {'image': memoryview}.
+    """
+    media_type = 'image/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            raise ParseError("Empty image body")
+        max_bytes = getattr(settings, 'FACE_UPLOAD_MAX_BYTES', 10 * 1024 * 1024)
+        body = stream.read(max_bytes + 1)
+        if not body:
+            raise ParseError("Empty image body")
+        if len(body) > max_bytes:
+            raise ParseError(f"Image larger than {max_bytes} bytes")
+        return {'image': memoryview(body)}
+
+
+IMAGE_PARSER_CLASSES = [JSONParser, MultiPartParser, FormParser, RawImageParser]
+
+
+def image_payload(value):
+    """
+    Normalize one uploaded image value for face_service.
+
+    Returns:
+        The base64 string unchanged, a memoryview for binary uploads, or None
+    """
+    if value is None or isinstance(value, (str, memoryview)):
+        return value or None
+    if isinstance(value, (bytes, bytearray)):
+        return memoryview(value)
+    if isinstance(value, UploadedFile):
+        file = value.file
+        # In-memory uploads are BytesIO: expose their buffer without copying
+        if hasattr(file, 'getbuffer'):
+            return file.getbuffer()
+        value.seek(0)
+        return memoryview(value.read())
+    return value
+
+
+def get_image(request, key='image'):
+    """The single image sent with a request, in any supported upload format."""
+    return image_payload(request.data.get(key))
+
+
+def get_images(request, key='images'):
+    """All images sent under a list key (JSON array or repeated multipart field)."""
+    if hasattr(request.data, 'getlist'):
+        values = request.data.getlist(key)
+    else:
+        values = request.data.get(key) or []
+    if not isinstance(values, list):
+        return values
+    return [image_payload(value) for value in values]
+
+
+def get_param(request, key):
+    """A request parameter from the body, falling back to the query string for raw uploads."""
+    value = request.data.get(key) if hasattr(request.data, 'get') else None
+    if value in (None, ''):
+        value = request.query_params.get(key)
+    return value
@@ -6,14 +6,33 @@ from django.contrib.auth import authenticate
 from django.conf import settings
 from django.core.mail import send_mail
 from django.utils import timezone
-from .models import User, Event, AttendanceRecord, Enrollment, EmailVerificationToken
-from .serializers import UserSerializer, EventSerializer, AttendanceSerializer, EnrollmentSerializer
+from django.http import StreamingHttpResponse
+from django.db.models import F, Max, Sum
+from .models import User, Event, AttendanceRecord, AttendanceSummary, Enrollment, EmailVerificationToken
+from .exports import EXPORT_FORMATS, PYARROW_AVAILABLE, RECORD_COLUMNS, SUMMARY_COLUMNS, stream_export
+from .filters import filter_attendance, filter_date_range, filter_event, filter_events
+from .pagination import AttendanceCursorPagination, EventCursorPagination
+from .roles import is_host
+from .uploads import IMAGE_PARSER_CLASSES, get_image, get_images, get_param
+from .serializers import UserSerializer, EventSerializer, AttendanceSerializer, AttendanceSummarySerializer, EnrollmentSerializer
 from .services.face_service import (
+    CURRENT_MODEL_ID,
     encode_face_from_base64,
+    encode_faces_from_base64,
+    aggregate_templates,
     compare_faces,
-    face_encoding_to_bytes,
     recognize_faces_in_image # Add this import
 )
+from .services.encoder_pool import FaceEncoderUnavailable
+from .services.attendance_service import mark_batch_matches
+from .services.attendance_spool import get_attendance_spool, spool_enabled
+from .services.gallery_cache import get_event_gallery, invalidate_event_gallery, invalidate_user_galleries
+from .services.face_index import get_identification_index, update_user_in_index
+from .services.embedding_store import (
+    delete_user_embedding,
+    load_user_templates,
+    save_user_templates,
+)
 import random
 import string
 import datetime
@@ -112,26 +131,25 @@ class EventViewSet(viewsets.ModelViewSet):
     serializer_class = EventSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    pagination_class = None # Explicitly disable pagination to show all events
+    # Plain list unless the client asks for cursor pages (?page_size= / ?cursor=)
+    pagination_class = EventCursorPagination
 
     def get_queryset(self):
         user = self.request.user
         
         # Robust Host Check: 
         # 1. Check strict role 'host' (case-insensitive)
-        # 2. OR check if this user actually owns any events (fallback for role mismatches)
-        is_host = (user.role and user.role.lower() == 'host') or Event.objects.filter(host=user).exists()
-        
-        # Debug Logging
-        print(f"DEBUG: EventViewSet list user={user.username} role='{user.role}' inferred_host={is_host}")
+        # 2. OR check if this user actually owns any events (fallback for role mismatches, cached)
+        host_view = is_host(user)
+        logger.debug("Event queryset user_id=%s role=%s host_view=%s", user.id, user.role, host_view)
         
-        if is_host:
+        if host_view:
             qs = Event.objects.filter(host=user).order_by('-date', '-time') # Added ordering for convenience
-            print(f"DEBUG: Returning HOST queryset count={qs.count()}")
-            return qs
-            
-        qs = Event.objects.filter(enrollments__student=user).order_by('-event__date')
-        print(f"DEBUG: Returning STUDENT queryset count={qs.count()}")
+        else:
+            qs = Event.objects.filter(enrollments__student=user).order_by('-date', '-time')
+
+        if self.action == 'list':
+            qs = filter_events(qs, self.request)
         return qs
         
     def perform_create(self, serializer):
@@ -147,6 +165,7 @@ class EventViewSet(viewsets.ModelViewSet):
                  return Response({"message": "Already enrolled"}, status=200)
             
             Enrollment.objects.create(student=request.user, event=event)
+            invalidate_event_gallery(event.id)
             return Response({"message": f"Joined {event.name}"})
         except Event.DoesNotExist:
             return Response({"error": "Invalid code"}, status=404)
@@ -158,7 +177,7 @@ class EventViewSet(viewsets.ModelViewSet):
     def start_session(self, request, pk=None):
         event = self.get_object()
         # Allow if user is the host in the data, regardless of role string
-        if event.host != request.user:
+        if event.host_id != request.user.id:
              return Response({"error": "Not authorized. You are not the host of this event."}, status=403)
         
         event.is_live = True
@@ -169,13 +188,23 @@ class EventViewSet(viewsets.ModelViewSet):
     def end_session(self, request, pk=None):
         event = self.get_object()
         # Allow if user is the host in the data
-        if event.host != request.user:
+        if event.host_id != request.user.id:
              return Response({"error": "Not authorized. You are not the host of this event."}, status=403)
         
         event.is_live = False
         event.save()
         return Response({"status": "ended", "is_live": False})
 
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """Per-date present/late/absent counts for an event, for reports."""
+        event = self.get_object()
+        if event.host_id != request.user.id:
+             return Response({"error": "Not authorized. You are not the host of this event."}, status=403)
+
+        summaries = event.attendance_summaries.order_by('date')
+        return Response(AttendanceSummarySerializer(summaries, many=True).data)
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         user = request.user
@@ -187,24 +216,20 @@ class EventViewSet(viewsets.ModelViewSet):
         # 2. Active Sessions: Events scheduled for today
         active_sessions = Event.objects.filter(host=user, date=today).count()
         
-        # 3. Avg Attendance: Detailed calculation
-        # This is a bit complex. Let's look at PAST events only to avoid skewing with upcoming 0-attendance events.
-        past_events = Event.objects.filter(host=user, date__lt=today)
-        
-        total_attendance_percentage = 0
-        events_count_for_avg = 0
-        
-        for event in past_events:
-            enrolled_count = event.enrollments.count()
-            if enrolled_count > 0:
-                attendance_count = event.attendance_records.filter(status__in=['present', 'late']).count()
-                event_percentage = (attendance_count / enrolled_count) * 100
-                total_attendance_percentage += event_percentage
-                events_count_for_avg += 1
-                
+        # 3. Avg Attendance: mean of the per-event attendance percentages, read from the
+        # maintained AttendanceSummary rows (one query however many events a host has).
+        # Only PAST events with enrollments count, to avoid skewing with upcoming 0-attendance events.
+        per_event = AttendanceSummary.objects.filter(
+            event__host=user, event__date__lt=today, enrolled_count__gt=0
+        ).values('event').annotate(
+            attended=Sum(F('present_count') + F('late_count')),
+            enrolled=Max('enrolled_count'),
+        ).values_list('attended', 'enrolled')
+        percentages = [attended * 100 / enrolled for attended, enrolled in per_event]
+
         avg_attendance = 0
-        if events_count_for_avg > 0:
-            avg_attendance = round(total_attendance_percentage / events_count_for_avg, 1)
+        if percentages:
+            avg_attendance = round(sum(percentages) / len(percentages), 1)
             
         return Response({
             "total_students": total_students,
@@ -215,19 +240,69 @@ class EventViewSet(viewsets.ModelViewSet):
 class AttendanceViewSet(viewsets.ModelViewSet):
     serializer_class = AttendanceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Plain list unless the client asks for cursor pages (?page_size= / ?cursor=)
+    pagination_class = AttendanceCursorPagination
 
     def get_queryset(self):
         # Hosts see all attendance for their events, Students see their own
         user = self.request.user
         if user.role == 'host':
-             return AttendanceRecord.objects.filter(event__host=user)
-        return AttendanceRecord.objects.filter(student=user)
+             qs = AttendanceRecord.objects.filter(event__host=user)
+        else:
+            qs = AttendanceRecord.objects.filter(student=user)
 
+        # The serializer reads student.username and event.name for every row
+        qs = qs.select_related('student', 'event').order_by('-timestamp', '-id')
+        if self.action == 'list':
+            qs = filter_attendance(qs, self.request)
+        return qs
 
-    @action(detail=False, methods=['post'])
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream the host's attendance as CSV, NDJSON or Parquet.
+
+        Query params: output (csv|ndjson|parquet, default csv), table (records|summary,
+        default records), event, date_from, date_to (a term) and, for records, status.
+        """
+        user = request.user
+        if not is_host(user):
+            return Response({"error": "Only hosts can export attendance."}, status=403)
+
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"Unknown output format. Use one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+        if export_format == 'parquet' and not PYARROW_AVAILABLE:
+            return Response({"error": "Parquet export requires pyarrow to be installed on the server."}, status=400)
+
+        table = request.query_params.get('table', 'records')
+        if table == 'summary':
+            # Per (event, date) counts from the maintained summary table
+            queryset = filter_date_range(filter_event(
+                AttendanceSummary.objects.filter(event__host=user), request
+            ), request).order_by('event_id', 'date')
+            columns = SUMMARY_COLUMNS
+        elif table == 'records':
+            queryset = filter_attendance(
+                AttendanceRecord.objects.filter(event__host=user), request
+            ).order_by('id')
+            columns = RECORD_COLUMNS
+        else:
+            return Response({"error": "Unknown table. Use records or summary."}, status=400)
+
+        filename = f"attendance-{table}-{request.query_params.get('event') or 'all'}.{export_format}"
+        response = StreamingHttpResponse(
+            stream_export(queryset, columns, export_format),
+            content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['post'], parser_classes=IMAGE_PARSER_CLASSES)
     def batch_recognize(self, request):
-        event_id = request.data.get('event_id')
-        image_data = request.data.get('image')
+        event_id = get_param(request, 'event_id')
+        image_data = get_image(request)
         
         if not event_id or not image_data:
             return Response({"error": "Missing event_id or image"}, status=400)
@@ -237,71 +312,34 @@ class AttendanceViewSet(viewsets.ModelViewSet):
         except Event.DoesNotExist:
             return Response({"error": "Event not found"}, status=404)
             
-        if event.host != request.user:
+        if event.host_id != request.user.id:
             return Response({"error": "Only host can perform batch recognition"}, status=403)
             
-        # Get all enrolled students who have face embeddings
-        enrollments = Enrollment.objects.filter(event=event).select_related('student')
-        
-        known_faces = {}
-        student_map = {}
-        
-        for enrollment in enrollments:
-            student = enrollment.student
-            if student.face_embedding:
-                known_faces[student.id] = student.face_embedding
-                student_map[student.id] = student
+        # Embedding matrix of all enrolled students with faces (cached per event)
+        known_faces = get_event_gallery(event.id)
                 
-        if not known_faces:
+        if not len(known_faces):
              return Response({"message": "No students with enrolled faces found for this event", "matches": []})
              
         # Perform recognition
-        matches = recognize_faces_in_image(image_data, known_faces)
-        
-        results = []
-        today = datetime.date.today()
+        try:
+            matches = recognize_faces_in_image(image_data, known_faces)
+        except FaceEncoderUnavailable as e:
+            logger.warning(f"Face encoder unavailable: {str(e)}")
+            return Response({"error": "Face recognition is busy. Please retry."}, status=503, headers={"Retry-After": "1"})
         
-        for match in matches:
-            student_id = match['user_id']
-            confidence = match['confidence']
-            student = student_map[student_id]
-            
-            # Mark attendance
-            # Determine status (logic similar to single mark)
-            now = timezone.now()
-            event_datetime = timezone.make_aware(
-                datetime.datetime.combine(event.date, event.time)
-            )
-            is_late = now > event_datetime + event.duration
-            status_val = 'late' if is_late else 'present'
-            
-            record, created = AttendanceRecord.objects.get_or_create(
-                student=student,
-                event=event,
-                date=today,
-                defaults={
-                    'status': status_val,
-                    'confidence_score': confidence,
-                    'time': datetime.datetime.now().time(),
-                }
-            )
-            
-            results.append({
-                "student": student.username,
-                "status": "marked" if created else "already_marked",
-                "time": record.time.strftime("%I:%M %p"),
-                "confidence": round(confidence, 2)
-            })
+        # Mark attendance for every matched student
+        results = mark_batch_matches(event, matches)
             
         return Response({
             "matches_count": len(results),
             "results": results
         })
 
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], parser_classes=IMAGE_PARSER_CLASSES)
     def mark_live(self, request):
-        event_id = request.data.get('event_id')
-        image_data = request.data.get('image') # Base64 string
+        event_id = get_param(request, 'event_id')
+        image_data = get_image(request) # Base64 string, or memoryview for binary uploads
         
         try:
             event = Event.objects.get(id=event_id)
@@ -317,7 +355,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             }, status=403)
 
         # Check if user has enrolled their face
-        if not user.face_embedding:
+        enrolled_templates = load_user_templates(user)
+        if enrolled_templates is None:
             return Response({
                 "status": "error",
                 "message": "Face not enrolled. Please enroll your face first."
@@ -354,10 +393,16 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                 }, status=400)
             
             # Compare with enrolled face
-            is_match, confidence = compare_faces(user.face_embedding, current_face_encoding, tolerance=0.6)
+            is_match, confidence = compare_faces(enrolled_templates, current_face_encoding, tolerance=0.6)
             
             logger.info(f"Face comparison for user {user.username}: match={is_match}, confidence={confidence:.2f}")
             
+        except FaceEncoderUnavailable as e:
+            logger.warning(f"Face encoder unavailable: {str(e)}")
+            return Response({
+                "status": "busy",
+                "message": "Face recognition is busy. Please try again in a moment."
+            }, status=503, headers={"Retry-After": "1"})
         except Exception as e:
             logger.error(f"Error during face recognition: {str(e)}")
             return Response({
@@ -377,6 +422,8 @@ class AttendanceViewSet(viewsets.ModelViewSet):
             
             # Check if already marked for today/session
             today = datetime.date.today()
+            if spool_enabled():
+                return self._spool_live_attendance(user, event, today, attendance_status, confidence)
             try:
                 record, created = AttendanceRecord.objects.get_or_create(
                     student=user,
@@ -412,6 +459,119 @@ class AttendanceViewSet(viewsets.ModelViewSet):
                  "confidence": round(confidence, 2)
              }, status=400)
 
+    def _spool_live_attendance(self, user, event, today, attendance_status, confidence):
+        """
+        Write-behind path of mark_live: journal the attendance and answer at once,
+        the spool flusher writes the AttendanceRecord (see services.attendance_spool).
+        """
+        record = AttendanceRecord.objects.filter(student=user, event=event, date=today).only('time').first()
+        if record is not None:
+            marked_at = record.time
+        else:
+            now = datetime.datetime.now().time()
+            marked_at = get_attendance_spool().append(event.id, user.id, today, now, attendance_status, confidence)
+            if marked_at is None:
+                return Response({
+                    "status": "marked",
+                    "student": user.username,
+                    "time": now.strftime("%I:%M %p"),
+                    "confidence": round(confidence, 2),
+                    "queued": True
+                })
+        return Response({
+            "status": "already_marked",
+            "student": user.username,
+            "time": marked_at.strftime("%I:%M %p")
+        })
+
+    @action(detail=False, methods=['post'], parser_classes=IMAGE_PARSER_CLASSES)
+    def identify(self, request):
+        """
+        Walk-up kiosk check-in: identify the face among every enrolled user and mark
+        them present in the host's live event(s) they are enrolled in. No join code
+        or username is needed; pass event_id to restrict the check-in to one event.
+        """
+        image_data = get_image(request)
+        event_id = get_param(request, 'event_id')
+
+        if not image_data:
+            return Response({"status": "error", "message": "No image provided"}, status=400)
+
+        events = Event.objects.filter(host=request.user, is_live=True)
+        if event_id:
+            events = events.filter(id=event_id)
+        events = list(events)
+        if not events:
+            return Response({"status": "error", "message": "No live session found for this kiosk"}, status=404)
+
+        try:
+            current_face_encoding = encode_face_from_base64(image_data)
+        except FaceEncoderUnavailable as e:
+            logger.warning(f"Face encoder unavailable: {str(e)}")
+            return Response({
+                "status": "busy",
+                "message": "Face recognition is busy. Please try again in a moment."
+            }, status=503, headers={"Retry-After": "1"})
+        if current_face_encoding is None:
+            return Response({
+                "status": "failed",
+                "message": "No face detected in image. Please ensure your face is clearly visible."
+            }, status=400)
+
+        tolerance = 0.6
+        nearest = get_identification_index().search(current_face_encoding, k=1)
+        if not nearest or nearest[0][1] > tolerance:
+            return Response({"status": "failed", "message": "Face not recognized."}, status=400)
+
+        student_id, distance = nearest[0]
+        confidence = max(0.0, 1.0 - min(distance / tolerance, 1.0))
+        student = User.objects.get(id=student_id)
+
+        enrolled_event_ids = set(
+            Enrollment.objects.filter(student=student, event__in=events).values_list('event_id', flat=True)
+        )
+        today = datetime.date.today()
+        results = []
+        for event in events:
+            if event.id not in enrolled_event_ids:
+                continue
+            now = timezone.now()
+            event_datetime = timezone.make_aware(
+                datetime.datetime.combine(event.date, event.time)
+            )
+            is_late = now > event_datetime + event.duration
+            record, created = AttendanceRecord.objects.get_or_create(
+                student=student,
+                event=event,
+                date=today,
+                defaults={
+                    'status': 'late' if is_late else 'present',
+                    'confidence_score': confidence,
+                    'time': datetime.datetime.now().time(),
+                }
+            )
+            results.append({
+                "event_id": event.id,
+                "event": event.name,
+                "status": "marked" if created else "already_marked",
+                "time": record.time.strftime("%I:%M %p"),
+            })
+
+        if not results:
+            return Response({
+                "status": "not_enrolled",
+                "student": student.username,
+                "message": "You are not enrolled in this session.",
+                "confidence": round(confidence, 2)
+            }, status=403)
+
+        return Response({
+            "status": "identified",
+            "student": student.username,
+            "confidence": round(confidence, 2),
+            "results": results
+        })
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -429,35 +589,63 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
     
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], parser_classes=IMAGE_PARSER_CLASSES)
     def enroll_face(self, request):
         # We use detail=False to use /users/enroll_face/ (acting on current user)
         # Or detail=True for /users/<id>/enroll_face/
         # Let's use detail=False and rely on request.user which is simpler for the frontend
         
+        # Send either a single 'image' or several frames as 'images'
         user = request.user
-        image_data = request.data.get('image')
+        images = get_images(request)
+        if not images and get_image(request) is not None:
+            images = [get_image(request)]
         
-        if not image_data:
+        if not images:
             return Response({"message": "No image provided"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        max_frames = getattr(settings, 'FACE_ENROLL_MAX_FRAMES', 10)
+        if not isinstance(images, list) or len(images) > max_frames:
+            return Response({
+                "message": f"Send between 1 and {max_frames} images",
+                "error": "TOO_MANY_IMAGES"
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        # Encode face from image
+        # Encode faces from all images in parallel
         try:
-            face_encoding = encode_face_from_base64(image_data)
+            if len(images) == 1:
+                encodings = [encode_face_from_base64(images[0])]
+            else:
+                encodings = encode_faces_from_base64(images)
+            face_encodings = [encoding for encoding in encodings if encoding is not None]
             
-            if face_encoding is None:
+            if not face_encodings:
                 return Response({
                     "message": "No face detected in image. Please ensure your face is clearly visible.",
                     "error": "NO_FACE_DETECTED"
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Convert encoding to bytes for database storage
-            encoding_bytes = face_encoding_to_bytes(face_encoding)
-            user.face_embedding = encoding_bytes
-            user.save(update_fields=["face_embedding"])
+            # Drop outlier frames and keep a mean template or a small template set
+            templates, inliers = aggregate_templates(
+                face_encodings,
+                mode=getattr(settings, 'FACE_TEMPLATE_MODE', 'set'),
+                max_templates=getattr(settings, 'FACE_MAX_TEMPLATES', 3),
+                outlier_distance=getattr(settings, 'FACE_TEMPLATE_OUTLIER_DISTANCE', 0.4),
+            )
+            
+            # Store the compact encodings in the embedding table
+            save_user_templates(user, templates, model_id=CURRENT_MODEL_ID)
+            invalidate_user_galleries(user.id)
+            update_user_in_index(user.id, templates)
             
-            logger.info(f"Face enrolled successfully for user {user.username}")
+            logger.info(f"Face enrolled successfully for user {user.username} ({len(templates)} templates)")
             
+        except FaceEncoderUnavailable as exc:
+            logger.warning(f"Face encoder unavailable: {str(exc)}")
+            return Response({
+                "message": "Face recognition is busy. Please try again in a moment.",
+                "error": "ENCODER_BUSY"
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
         except Exception as exc:
             logger.error(f"Error enrolling face: {str(exc)}")
             return Response({
@@ -465,7 +653,13 @@ class UserViewSet(viewsets.ModelViewSet):
                 "error": str(exc)
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({"message": "Face enrolled successfully"})
+        return Response({
+            "message": "Face enrolled successfully",
+            "frames": len(images),
+            "faces_detected": len(face_encodings),
+            "outliers_rejected": int((~inliers).sum()),
+            "templates": len(templates)
+        })
     
     @action(detail=False, methods=['post'])
     def change_password(self, request):
@@ -497,11 +691,11 @@ class UserViewSet(viewsets.ModelViewSet):
         """Reset user's face enrollment"""
         user = request.user
         
-        if not user.face_embedding:
+        if not delete_user_embedding(user):
             return Response({"error": "No face data to reset"}, status=status.HTTP_400_BAD_REQUEST)
         
-        user.face_embedding = None
-        user.save(update_fields=["face_embedding"])
+        invalidate_user_galleries(user.id)
+        update_user_in_index(user.id, None)
         
         logger.info(f"Face data reset for user {user.username}")
         return Response({"message": "Face data reset successfully"})
@@ -0,0 +1,12 @@
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+django_application = get_asgi_application()
+
+# Imported after Django is set up: the live stream uses the ORM
+from api.live_stream import LiveStreamRouter  # noqa: E402
+
+application = LiveStreamRouter(django_application)
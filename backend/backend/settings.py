@@ -57,6 +57,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+# Serves HTTP plus the /ws/live/<event_id>/ attendance stream (run with an ASGI server, e.g. uvicorn)
+ASGI_APPLICATION = 'backend.asgi.application'
 
 DATABASES = {
     'default': {
@@ -67,6 +69,8 @@ DATABASES = {
 
 AUTH_USER_MODEL = 'api.User'
 
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -97,6 +101,46 @@ SIMPLE_JWT = {
 
 CORS_ALLOW_ALL_ORIGINS = True # For dev only
 
+# Face recognition
+# Worker processes for dlib detection/encoding (0 runs it inline in the request thread)
+FACE_ENCODER_WORKERS = int(os.getenv('FACE_ENCODER_WORKERS', str(os.cpu_count() or 1)))
+# Jobs allowed to be queued or running before requests get 503 + Retry-After
+FACE_ENCODER_MAX_PENDING = int(os.getenv('FACE_ENCODER_MAX_PENDING', str(FACE_ENCODER_WORKERS * 4)))
+FACE_ENCODER_TIMEOUT = float(os.getenv('FACE_ENCODER_TIMEOUT', '10'))
+FACE_ENCODER_QUEUE_WAIT = float(os.getenv('FACE_ENCODER_QUEUE_WAIT', '0.5'))
+# Largest raw image body accepted by the recognition endpoints
+FACE_UPLOAD_MAX_BYTES = int(os.getenv('FACE_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+# Longest image side used for face detection (single-face frames / group frames) and for encoding
+FACE_DETECTION_MAX_SIDE = int(os.getenv('FACE_DETECTION_MAX_SIDE', '640'))
+FACE_BATCH_DETECTION_MAX_SIDE = int(os.getenv('FACE_BATCH_DETECTION_MAX_SIDE', '1280'))
+FACE_ENCODE_MAX_SIDE = int(os.getenv('FACE_ENCODE_MAX_SIDE', '1920'))
+# Seconds a worker keeps an event's embedding matrix before reloading it from the database
+FACE_GALLERY_CACHE_TTL = int(os.getenv('FACE_GALLERY_CACHE_TTL', '300'))
+# Storage precision of enrolled embeddings: float32 (default) or float16
+FACE_EMBEDDING_DTYPE = os.getenv('FACE_EMBEDDING_DTYPE', 'float32')
+# Multi-frame enrollment: 'set' keeps up to FACE_MAX_TEMPLATES samples, 'mean' averages them
+FACE_ENROLL_MAX_FRAMES = int(os.getenv('FACE_ENROLL_MAX_FRAMES', '10'))
+FACE_ENROLL_MAX_WORKERS = int(os.getenv('FACE_ENROLL_MAX_WORKERS', '4'))
+FACE_TEMPLATE_MODE = os.getenv('FACE_TEMPLATE_MODE', 'set')
+FACE_MAX_TEMPLATES = int(os.getenv('FACE_MAX_TEMPLATES', '3'))
+FACE_TEMPLATE_OUTLIER_DISTANCE = float(os.getenv('FACE_TEMPLATE_OUTLIER_DISTANCE', '0.4'))
+# mark_live writes: 'direct' (get_or_create in the request) or 'spool' (journal + background
+# flush, for SQLite deployments where a class marking at once hits "database is locked")
+ATTENDANCE_WRITE_MODE = os.getenv('ATTENDANCE_WRITE_MODE', 'direct')
+ATTENDANCE_SPOOL_PATH = os.getenv('ATTENDANCE_SPOOL_PATH', str(BASE_DIR / 'attendance_spool.sqlite3'))
+ATTENDANCE_SPOOL_FLUSH_INTERVAL = float(os.getenv('ATTENDANCE_SPOOL_FLUSH_INTERVAL', '1.0'))
+ATTENDANCE_SPOOL_BATCH_SIZE = int(os.getenv('ATTENDANCE_SPOOL_BATCH_SIZE', '500'))
+# Rows fetched per database round trip by the streaming attendance export
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+# How long a user's event ownership (host fallback for role mismatches) is cached
+HOST_ROLE_CACHE_TTL = int(os.getenv('HOST_ROLE_CACHE_TTL', '300'))
+# Live WebSocket stream: how often an open session re-checks Event.is_live
+LIVE_STREAM_LIVE_CHECK_SECONDS = int(os.getenv('LIVE_STREAM_LIVE_CHECK_SECONDS', '10'))
+# Institution-wide identification index (kiosk check-in)
+FACE_INDEX_TTL = int(os.getenv('FACE_INDEX_TTL', '3600'))
+FACE_INDEX_N_PROBE = int(os.getenv('FACE_INDEX_N_PROBE', '8'))
+FACE_INDEX_EXACT_BELOW = int(os.getenv('FACE_INDEX_EXACT_BELOW', '2048'))
+
 # Email configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
 EMAIL_HOST = os.getenv('EMAIL_HOST', '')